@@ -2,7 +2,17 @@
 Agents module initialization
 """
 
-from agents.base_agent import BaseAgent, ExecutionStep, Artifact, AgentResponse, StepType
+from agents.base_agent import BaseAgent, ExecutionStep, Artifact, AgentResponse, RunContext, StepType
+from agents.events import (
+    AgentEvent,
+    StartEvent,
+    StepEvent,
+    TokenEvent,
+    ArtifactEvent,
+    CompleteEvent,
+    ErrorEvent,
+    StreamEvent
+)
 from agents.general_agent import GeneralAgent, create_general_agent
 
 __all__ = [
@@ -10,7 +20,16 @@ __all__ = [
     "ExecutionStep",
     "Artifact",
     "AgentResponse",
+    "RunContext",
     "StepType",
+    "AgentEvent",
+    "StartEvent",
+    "StepEvent",
+    "TokenEvent",
+    "ArtifactEvent",
+    "CompleteEvent",
+    "ErrorEvent",
+    "StreamEvent",
     "GeneralAgent",
     "create_general_agent"
 ]
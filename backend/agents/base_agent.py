@@ -4,21 +4,78 @@ Thought → Action → Observation → Repeat
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Any, AsyncGenerator
+from typing import Optional, List, Dict, Any, AsyncGenerator, Callable, Iterator, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
+import asyncio
+import inspect
+import itertools
+import time
 import uuid
 import json
+import re
 from loguru import logger
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 from agno.tools import Toolkit
 
+from agents.events import (
+    ArtifactEvent,
+    CompleteEvent,
+    ErrorEvent,
+    StartEvent,
+    StepEvent,
+    StreamEvent,
+    TokenEvent
+)
 from config import settings
 
 
+# Matches <artifact type="..." language="..." title="...">content</artifact> blocks
+_ARTIFACT_RE = re.compile(
+    r'<artifact\s+type="([^"]+)"(?:\s+language="([^"]+)")?(?:\s+title="([^"]+)")?>(.*?)</artifact>',
+    re.DOTALL
+)
+
+_ARTIFACT_OPEN_TAG = "<artifact"
+_ARTIFACT_CLOSE_TAG = "</artifact>"
+_ARTIFACT_PLACEHOLDER = "[Artifact created]"
+
+# Model objects shared by every agent using the same model, along with their
+# lazily created HTTP clients and connection pools
+_shared_models: Dict[str, OpenAIChat] = {}
+
+# Marks the end of a synchronous stream consumed from a worker thread
+_STREAM_END = object()
+
+# Step IDs only need to be unique within the process; sessions and artifacts keep UUIDs
+_step_counter = itertools.count(1)
+
+
+def _ns_to_datetime(ns: int) -> datetime:
+    """Convert a time.time_ns() timestamp to a local datetime"""
+    return datetime.fromtimestamp(ns / 1_000_000_000)
+
+
+def _get_shared_model(model_name: str) -> OpenAIChat:
+    """Return the process-wide OpenAIChat instance for a model"""
+    model = _shared_models.get(model_name)
+    if model is None:
+        model = _shared_models[model_name] = OpenAIChat(id=model_name)
+    return model
+
+
+def _truncate_output(output: Any) -> str:
+    """Render a tool output as a string capped at settings.max_tool_output_chars"""
+    text = output if isinstance(output, str) else str(output)
+    limit = settings.max_tool_output_chars
+    if len(text) > limit:
+        return f"{text[:limit]}...(+{len(text) - limit} chars)"
+    return text
+
+
 class StepType(str, Enum):
     """Types of steps in the ReAct loop"""
     THOUGHT = "thought"
@@ -28,18 +85,22 @@ class StepType(str, Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class ExecutionStep:
     """Represents a single step in the execution loop"""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=lambda: f"s{next(_step_counter)}")
     type: StepType = StepType.THOUGHT
     content: str = ""
     tool_name: Optional[str] = None
     tool_input: Optional[Dict[str, Any]] = None
-    tool_output: Optional[Any] = None
-    timestamp: datetime = field(default_factory=datetime.now)
+    tool_output: Optional[str] = None  # Size-capped rendering of the raw output
+    timestamp_ns: int = field(default_factory=time.time_ns)  # Wall clock, formatted in to_dict
     duration_ms: Optional[int] = None
     
+    def __post_init__(self):
+        # Summarize large outputs (pages, dataframes) up front so the raw object can be freed
+        self.tool_output = _truncate_output(self.tool_output) if self.tool_output is not None else None
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
@@ -47,13 +108,13 @@ class ExecutionStep:
             "content": self.content,
             "tool_name": self.tool_name,
             "tool_input": self.tool_input,
-            "tool_output": str(self.tool_output) if self.tool_output else None,
-            "timestamp": self.timestamp.isoformat(),
+            "tool_output": self.tool_output,
+            "timestamp": _ns_to_datetime(self.timestamp_ns),  # Serialized natively by orjson
             "duration_ms": self.duration_ms
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Artifact:
     """Represents a deliverable artifact"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -62,7 +123,7 @@ class Artifact:
     content: str = ""
     language: Optional[str] = None  # For code artifacts
     metadata: Dict[str, Any] = field(default_factory=dict)
-    created_at: datetime = field(default_factory=datetime.now)
+    created_at_ns: int = field(default_factory=time.time_ns)  # Wall clock, formatted in to_dict
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -72,11 +133,11 @@ class Artifact:
             "content": self.content,
             "language": self.language,
             "metadata": self.metadata,
-            "created_at": self.created_at.isoformat()
+            "created_at": _ns_to_datetime(self.created_at_ns)  # Serialized natively by orjson
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentResponse:
     """Complete response from an agent execution"""
     session_id: str
@@ -99,6 +160,85 @@ class AgentResponse:
         }
 
 
+@dataclass(slots=True)
+class RunContext:
+    """Per-execution state threaded through the ReAct loop"""
+    session_id: str
+    steps: List[ExecutionStep] = field(default_factory=list)
+    artifacts: List[Artifact] = field(default_factory=list)
+
+
+class ArtifactStreamParser:
+    """
+    Incrementally splits a token stream into plain text and completed artifacts.
+    
+    Text is released as soon as it cannot be part of an artifact tag; anything
+    from an opening `<artifact` onwards is held back until its closing tag
+    arrives, at which point the full match is released.
+    """
+    
+    def __init__(self):
+        # Held-back text is kept as a list of chunks and only joined once a
+        # closing tag may have arrived, avoiding quadratic string growth
+        self._parts: List[str] = []
+        self._tail = ""  # Last few held-back chars, to spot a closing tag split across chunks
+        self._holding_artifact = False
+    
+    def feed(self, chunk: str) -> List[Union[str, re.Match]]:
+        """Consume a chunk and return the text pieces and artifact matches it completes"""
+        self._parts.append(chunk)
+        
+        # Inside an artifact, nothing can be released until a closing tag shows up
+        window = self._tail + chunk
+        if self._holding_artifact and _ARTIFACT_CLOSE_TAG not in window:
+            self._tail = window[-(len(_ARTIFACT_CLOSE_TAG) - 1):]
+            return []
+        
+        buf = "".join(self._parts)
+        pieces: List[Union[str, re.Match]] = []
+        pos = 0
+        
+        # Only run the full pattern once a closing tag has arrived, and never
+        # past the last one so an unfinished artifact in the tail isn't rescanned
+        end = buf.rfind(_ARTIFACT_CLOSE_TAG)
+        if end != -1:
+            for match in _ARTIFACT_RE.finditer(buf, 0, end + len(_ARTIFACT_CLOSE_TAG)):
+                if match.start() > pos:
+                    pieces.append(buf[pos:match.start()])
+                pieces.append(match)
+                pos = match.end()
+        
+        rest = buf[pos:]
+        hold = self._holdback_start(rest)
+        if hold > 0:
+            pieces.append(rest[:hold])
+        
+        rest = rest[hold:]
+        self._parts = [rest] if rest else []
+        self._tail = rest[-(len(_ARTIFACT_CLOSE_TAG) - 1):]
+        self._holding_artifact = rest.startswith(_ARTIFACT_OPEN_TAG)
+        return pieces
+    
+    def flush(self) -> str:
+        """Release whatever is left, e.g. an artifact that was never closed"""
+        rest = "".join(self._parts)
+        self._parts, self._tail, self._holding_artifact = [], "", False
+        return rest
+    
+    @staticmethod
+    def _holdback_start(text: str) -> int:
+        """Index from which text may still turn into an artifact"""
+        idx = text.find(_ARTIFACT_OPEN_TAG)
+        if idx != -1:
+            return idx
+        
+        # Hold back a trailing partial opening tag, e.g. "<arti"
+        for size in range(min(len(text), len(_ARTIFACT_OPEN_TAG) - 1), 0, -1):
+            if _ARTIFACT_OPEN_TAG.startswith(text[-size:]):
+                return len(text) - size
+        return len(text)
+
+
 class BaseAgent(ABC):
     """
     Base Agent class implementing the ReAct loop pattern.
@@ -125,18 +265,15 @@ class BaseAgent(ABC):
         self.max_iterations = max_iterations or settings.max_iterations
         
         # Initialize the Agno agent
+        # (execution state lives in a per-call RunContext, so one instance
+        # can serve concurrent requests)
         self._init_agent()
-        
-        # Execution state
-        self.current_session_id: Optional[str] = None
-        self.execution_steps: List[ExecutionStep] = []
-        self.artifacts: List[Artifact] = []
-        
+    
     def _init_agent(self):
         """Initialize the underlying Agno agent"""
         self.agent = Agent(
             name=self.name,
-            model=OpenAIChat(id=self.model_name),
+            model=_get_shared_model(self.model_name),
             tools=self.tools,
             description=self.description,
             instructions=self._get_system_instructions(),
@@ -182,196 +319,215 @@ Guidelines:
         Execute the agent with the given user message.
         Implements the full ReAct loop.
         """
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
-        self.current_session_id = session_id or str(uuid.uuid4())
-        self.execution_steps = []
-        self.artifacts = []
+        ctx = RunContext(session_id=session_id or str(uuid.uuid4()))
         
-        logger.info(f"🎯 Starting execution: {self.current_session_id}")
+        logger.info(f"🎯 Starting execution: {ctx.session_id}")
         logger.info(f"📝 User message: {user_message[:100]}...")
         
         try:
             # Run the agent
-            response = await self._run_react_loop(user_message, context)
+            response = await self._run_react_loop(user_message, ctx, context)
             
-            end_time = time.time()
-            duration_ms = int((end_time - start_time) * 1000)
+            duration_ms = (time.perf_counter_ns() - start_time) // 1_000_000
             
             return AgentResponse(
-                session_id=self.current_session_id,
+                session_id=ctx.session_id,
                 success=True,
                 message=response,
-                steps=self.execution_steps,
-                artifacts=self.artifacts,
+                steps=ctx.steps,
+                artifacts=ctx.artifacts,
                 total_duration_ms=duration_ms,
-                iteration_count=len([s for s in self.execution_steps if s.type == StepType.ACTION])
+                iteration_count=len([s for s in ctx.steps if s.type == StepType.ACTION])
             )
             
         except Exception as e:
             logger.error(f"❌ Execution error: {str(e)}")
-            end_time = time.time()
-            duration_ms = int((end_time - start_time) * 1000)
+            duration_ms = (time.perf_counter_ns() - start_time) // 1_000_000
             
-            self.execution_steps.append(ExecutionStep(
+            ctx.steps.append(ExecutionStep(
                 type=StepType.ERROR,
                 content=str(e)
             ))
             
             return AgentResponse(
-                session_id=self.current_session_id,
+                session_id=ctx.session_id,
                 success=False,
                 message=f"Error during execution: {str(e)}",
-                steps=self.execution_steps,
-                artifacts=self.artifacts,
+                steps=ctx.steps,
+                artifacts=ctx.artifacts,
                 total_duration_ms=duration_ms,
-                iteration_count=len([s for s in self.execution_steps if s.type == StepType.ACTION])
+                iteration_count=len([s for s in ctx.steps if s.type == StepType.ACTION])
             )
     
     async def _run_react_loop(
         self,
         user_message: str,
+        ctx: RunContext,
         context: Optional[Dict[str, Any]] = None
     ) -> str:
         """Run the ReAct loop"""
         
         # Add initial thought step
-        self.execution_steps.append(ExecutionStep(
+        ctx.steps.append(ExecutionStep(
             type=StepType.THOUGHT,
             content=f"Analyzing request: {user_message}"
         ))
         
-        # Run the Agno agent
-        response = self.agent.run(user_message)
+        # Run the Agno agent without blocking the event loop
+        if hasattr(self.agent, "arun"):
+            response = await self.agent.arun(user_message)
+        else:
+            response = await asyncio.to_thread(self.agent.run, user_message)
         
         # Process the response and extract artifacts
-        final_message = self._process_response(response.content)
+        final_message = self._process_response(response.content, ctx)
         
         # Add final answer step
-        self.execution_steps.append(ExecutionStep(
+        ctx.steps.append(ExecutionStep(
             type=StepType.FINAL_ANSWER,
             content=final_message
         ))
         
         return final_message
     
-    def _process_response(self, response: str) -> str:
+    def _process_response(self, response: str, ctx: RunContext) -> str:
         """Process the agent response and extract artifacts"""
-        import re
         
-        # Extract artifacts from the response
-        artifact_pattern = r'<artifact\s+type="([^"]+)"(?:\s+language="([^"]+)")?(?:\s+title="([^"]+)")?>(.*?)</artifact>'
-        matches = re.findall(artifact_pattern, response, re.DOTALL)
-        
-        for match in matches:
-            artifact_type, language, title, content = match
-            artifact = Artifact(
-                type=artifact_type,
-                title=title or f"Artifact {len(self.artifacts) + 1}",
-                content=content.strip(),
-                language=language if language else None
-            )
-            self.artifacts.append(artifact)
-            logger.info(f"📦 Created artifact: {artifact.title} ({artifact.type})")
-        
-        # Remove artifact tags from the response for the message
-        clean_response = re.sub(artifact_pattern, '[Artifact created]', response, flags=re.DOTALL)
+        def _extract(match: re.Match) -> str:
+            self._create_artifact(match, ctx)
+            
+            # Remove artifact tags from the response for the message
+            return _ARTIFACT_PLACEHOLDER
         
-        return clean_response
+        # Extract artifacts and clean the message in a single pass
+        return _ARTIFACT_RE.sub(_extract, response)
+    
+    def _create_artifact(self, match: re.Match, ctx: RunContext) -> Artifact:
+        """Create an artifact from an artifact tag match"""
+        artifact_type, language, title, content = match.groups()
+        artifact = Artifact(
+            type=artifact_type,
+            title=title or f"Artifact {len(ctx.artifacts) + 1}",
+            content=content.strip(),
+            language=language if language else None
+        )
+        ctx.artifacts.append(artifact)
+        logger.info(f"📦 Created artifact: {artifact.title} ({artifact.type})")
+        return artifact
     
     async def stream_execute(
         self,
         user_message: str,
         session_id: Optional[str] = None,
         context: Optional[Dict[str, Any]] = None
-    ) -> AsyncGenerator[Dict[str, Any], None]:
+    ) -> AsyncGenerator[StreamEvent, None]:
         """
         Stream the agent execution, yielding updates as they happen.
         Useful for real-time UI updates.
         """
-        import time
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         
-        self.current_session_id = session_id or str(uuid.uuid4())
-        self.execution_steps = []
-        self.artifacts = []
+        ctx = RunContext(session_id=session_id or str(uuid.uuid4()))
         
         # Yield start event
-        yield {
-            "type": "start",
-            "session_id": self.current_session_id,
-            "timestamp": datetime.now().isoformat()
-        }
+        yield StartEvent(
+            session_id=ctx.session_id,
+            timestamp=datetime.now().isoformat()
+        )
         
         # Yield thought step
         thought_step = ExecutionStep(
             type=StepType.THOUGHT,
             content=f"Analyzing request: {user_message}"
         )
-        self.execution_steps.append(thought_step)
-        yield {
-            "type": "step",
-            "step": thought_step.to_dict()
-        }
+        ctx.steps.append(thought_step)
+        yield StepEvent(step=thought_step.to_dict())
         
         try:
-            # Stream the agent response
-            response_content = ""
+            # Stream the agent response, emitting artifacts as soon as they close
+            parser = ArtifactStreamParser()
+            message_parts: List[str] = []
             async for chunk in self._stream_agent_response(user_message):
-                response_content += chunk
-                yield {
-                    "type": "token",
-                    "content": chunk
-                }
+                for piece in parser.feed(chunk):
+                    if isinstance(piece, str):
+                        message_parts.append(piece)
+                        yield TokenEvent(content=piece)
+                    else:
+                        artifact = self._create_artifact(piece, ctx)
+                        message_parts.append(_ARTIFACT_PLACEHOLDER)
+                        yield TokenEvent(content=_ARTIFACT_PLACEHOLDER)
+                        yield ArtifactEvent(artifact=artifact.to_dict())
             
-            # Process final response
-            final_message = self._process_response(response_content)
+            rest = parser.flush()
+            if rest:
+                message_parts.append(rest)
+                yield TokenEvent(content=rest)
             
-            # Yield artifacts
-            for artifact in self.artifacts:
-                yield {
-                    "type": "artifact",
-                    "artifact": artifact.to_dict()
-                }
+            final_message = "".join(message_parts)
             
             # Yield final step
             final_step = ExecutionStep(
                 type=StepType.FINAL_ANSWER,
                 content=final_message
             )
-            self.execution_steps.append(final_step)
-            yield {
-                "type": "step",
-                "step": final_step.to_dict()
-            }
+            ctx.steps.append(final_step)
+            yield StepEvent(step=final_step.to_dict())
             
             # Yield complete event
-            end_time = time.time()
-            yield {
-                "type": "complete",
-                "session_id": self.current_session_id,
-                "success": True,
-                "total_duration_ms": int((end_time - start_time) * 1000)
-            }
+            yield CompleteEvent(
+                session_id=ctx.session_id,
+                success=True,
+                total_duration_ms=(time.perf_counter_ns() - start_time) // 1_000_000
+            )
             
         except Exception as e:
             logger.error(f"❌ Stream execution error: {str(e)}")
-            yield {
-                "type": "error",
-                "message": str(e)
-            }
+            yield ErrorEvent(message=str(e))
     
     async def _stream_agent_response(self, user_message: str) -> AsyncGenerator[str, None]:
         """Stream the agent's response tokens"""
-        # Use Agno's streaming capability
-        response_stream = self.agent.run(user_message, stream=True)
-        for chunk in response_stream:
+        if hasattr(self.agent, "arun"):
+            # Use Agno's async streaming capability; depending on the Agno version
+            # arun returns the async iterator directly or a coroutine resolving to it
+            response_stream = self.agent.arun(user_message, stream=True)
+            if inspect.isawaitable(response_stream):
+                response_stream = await response_stream
+        else:
+            # Fall back to the sync stream, consumed off the event loop
+            response_stream = self._iterate_in_thread(
+                lambda: self.agent.run(user_message, stream=True)
+            )
+        
+        async for chunk in response_stream:
             if hasattr(chunk, 'content') and chunk.content:
                 yield chunk.content
+    
+    @staticmethod
+    async def _iterate_in_thread(make_iterator: Callable[[], Iterator[Any]]) -> AsyncGenerator[Any, None]:
+        """Drive a blocking iterator in a worker thread and relay its items"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def _produce():
+            try:
+                for item in make_iterator():
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+        
+        producer = asyncio.ensure_future(asyncio.to_thread(_produce))
+        
+        while (item := await queue.get()) is not _STREAM_END:
+            yield item
+        
+        # Re-raise any error from the worker thread
+        await producer
 
     def add_artifact(
         self,
+        ctx: RunContext,
         artifact_type: str,
         title: str,
         content: str,
@@ -386,5 +542,5 @@ Guidelines:
             language=language,
             metadata=metadata or {}
         )
-        self.artifacts.append(artifact)
+        ctx.artifacts.append(artifact)
         return artifact
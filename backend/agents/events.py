@@ -0,0 +1,40 @@
+"""
+Agent Events - Typed events emitted while streaming an agent execution
+"""
+
+from typing import Any, Dict, Union
+import msgspec
+
+
+class AgentEvent(msgspec.Struct, tag_field="type"):
+    """Base class for streamed events, encoded with their tag as the "type" field"""
+
+
+class StartEvent(AgentEvent, tag="start"):
+    session_id: str
+    timestamp: str
+
+
+class StepEvent(AgentEvent, tag="step"):
+    step: Dict[str, Any]
+
+
+class TokenEvent(AgentEvent, tag="token"):
+    content: str
+
+
+class ArtifactEvent(AgentEvent, tag="artifact"):
+    artifact: Dict[str, Any]
+
+
+class CompleteEvent(AgentEvent, tag="complete"):
+    session_id: str
+    success: bool
+    total_duration_ms: int
+
+
+class ErrorEvent(AgentEvent, tag="error"):
+    message: str
+
+
+StreamEvent = Union[StartEvent, StepEvent, TokenEvent, ArtifactEvent, CompleteEvent, ErrorEvent]
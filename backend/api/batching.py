@@ -0,0 +1,92 @@
+"""
+Request Batching - Coalesce concurrent requests into micro-batches
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+from loguru import logger
+
+
+class RequestBatcher:
+    """
+    Collects concurrent calls to the same handler into micro-batches.
+    
+    Requests arriving within `max_wait_ms` of each other (up to `max_batch_size`)
+    are dispatched together, so calls that share the same system prompt and
+    instruction prefix hit the LLM back-to-back and can reuse the provider's
+    prompt cache. Identical in-flight requests are coalesced onto a single call.
+    """
+    
+    def __init__(
+        self,
+        handler: Callable[..., Awaitable[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: int = 10
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Dict[Tuple[Any, ...], asyncio.Future] = {}
+        self._dispatching: Set[asyncio.Task] = set()
+    
+    async def submit(self, *args: Any) -> Any:
+        """Queue a call and wait for its result"""
+        future = self._in_flight.get(args)
+        
+        if future is None:
+            self._ensure_worker()
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[args] = future
+            self._queue.put_nowait((args, future))
+        
+        # Shield so one caller disconnecting does not cancel a shared result
+        return await asyncio.shield(future)
+    
+    def _ensure_worker(self):
+        """Start the batching worker on first use"""
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+    
+    async def _run(self):
+        """Pull requests off the queue and dispatch them in batches"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Don't block the next batch while this one is running
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+    
+    async def _dispatch(self, batch: List[Tuple[Tuple[Any, ...], asyncio.Future]]):
+        """Run a batch concurrently and resolve each caller's future"""
+        logger.debug(f"📦 Dispatching batch of {len(batch)} request(s)")
+        
+        results = await asyncio.gather(
+            *(self.handler(*args) for args, _ in batch),
+            return_exceptions=True
+        )
+        
+        for (args, future), result in zip(batch, results):
+            self._in_flight.pop(args, None)
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
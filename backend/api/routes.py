@@ -3,22 +3,89 @@ API Routes - REST endpoints for the AI Agents Platform
 """
 
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from datetime import datetime
+import asyncio
+import hashlib
+import time
 import uuid
+import msgspec
+import orjson
+from cachetools import TTLCache
 from loguru import logger
+import redis.asyncio as aioredis
 
-from agents import GeneralAgent, create_general_agent, AgentResponse
+from agents import GeneralAgent, create_general_agent, AgentResponse, ArtifactEvent, StepEvent
+from api.batching import RequestBatcher
+from config import settings
 
 router = APIRouter()
 
-# Store active sessions
-sessions: Dict[str, Dict[str, Any]] = {}
+# Session storage: each session expires after `session_ttl` seconds of inactivity
+redis_client = aioredis.from_url(settings.redis_url, decode_responses=True)
 
 # Create a shared agent instance
 agent = create_general_agent()
 
+# Bound the number of concurrent executions hitting the LLM
+LLM_SEM = asyncio.Semaphore(settings.max_concurrency)
+
+# Serialized `/tools` response, built on first request
+_tools_manifest: Optional[bytes] = None
+
+# Streamed agent events are msgspec Structs, encoded straight to JSON bytes
+_event_encoder = msgspec.json.Encoder()
+
+
+async def _run_research(query: str) -> Dict[str, Any]:
+    async with LLM_SEM:
+        return await agent.research(query)
+
+
+async def _run_analysis(data_source: str, request: str) -> Dict[str, Any]:
+    async with LLM_SEM:
+        return await agent.analyze_data(data_source, request)
+
+
+async def _run_document(doc_type: str, requirements: str) -> Dict[str, Any]:
+    async with LLM_SEM:
+        return await agent.create_document(doc_type, requirements)
+
+
+# Micro-batchers for the convenience endpoints, which share the agent's prompt prefix
+research_batcher = RequestBatcher(_run_research, settings.batch_max_size, settings.batch_window_ms)
+analysis_batcher = RequestBatcher(_run_analysis, settings.batch_max_size, settings.batch_window_ms)
+document_batcher = RequestBatcher(_run_document, settings.batch_max_size, settings.batch_window_ms)
+
+# Responses of the convenience endpoints, keyed by a hash of the endpoint and its inputs
+response_cache: TTLCache = TTLCache(
+    maxsize=settings.response_cache_size,
+    ttl=settings.response_cache_ttl
+)
+
+
+async def _cached_submit(endpoint: str, batcher: RequestBatcher, *args: str) -> Dict[str, Any]:
+    """Serve repeated requests from the response cache, batching the misses"""
+    key = hashlib.blake2b(
+        orjson.dumps([endpoint, *args]),
+        digest_size=16
+    ).hexdigest()
+    
+    cached = response_cache.get(key)
+    if cached is not None:
+        logger.info(f"♻️ Cache hit for {endpoint}")
+        return cached
+    
+    response = await batcher.submit(*args)
+    
+    # Only cache successful executions so transient failures can be retried
+    if response.get("success"):
+        response_cache[key] = response
+    
+    return response
+
 
 # Request/Response Models
 class ChatMessage(BaseModel):
@@ -56,6 +123,71 @@ class ArtifactResponse(BaseModel):
     created_at: str
 
 
+# Session storage helpers
+
+def _session_key(session_id: str) -> str:
+    return f"sess:{session_id}"
+
+
+def _messages_key(session_id: str) -> str:
+    return f"sess_messages:{session_id}"
+
+
+def _artifacts_key(session_id: str) -> str:
+    return f"sess_artifacts:{session_id}"
+
+
+# Sorted set of session IDs scored by last activity, so listing never scans the keyspace
+SESSION_INDEX_KEY = "sess_index"
+
+
+async def _ensure_session(session_id: str) -> None:
+    """Create the session if it does not exist yet"""
+    key = _session_key(session_id)
+    now = datetime.now().isoformat()
+    
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hsetnx(key, "id", session_id)
+        pipe.hsetnx(key, "created_at", now)
+        pipe.expire(key, settings.session_ttl)
+        pipe.zadd(SESSION_INDEX_KEY, {session_id: time.time()})
+        await pipe.execute()
+
+
+async def _append_to_session(
+    session_id: str,
+    messages: List[Dict[str, Any]],
+    artifacts: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    """Append messages and artifacts to a session and refresh its TTL"""
+    keys = (_session_key(session_id), _messages_key(session_id), _artifacts_key(session_id))
+    
+    async with redis_client.pipeline(transaction=False) as pipe:
+        if messages:
+            pipe.rpush(keys[1], *(orjson.dumps(m) for m in messages))
+        if artifacts:
+            pipe.rpush(keys[2], *(orjson.dumps(a) for a in artifacts))
+        pipe.hset(keys[0], "last_activity", datetime.now().isoformat())
+        pipe.hincrby(keys[0], "message_count", len(messages))
+        pipe.zadd(SESSION_INDEX_KEY, {session_id: time.time()})
+        for key in keys:
+            pipe.expire(key, settings.session_ttl)
+        await pipe.execute()
+
+
+async def _get_session_artifacts(session_id: str) -> List[Dict[str, Any]]:
+    """Load a session's artifacts, raising 404 if the session does not exist"""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.exists(_session_key(session_id))
+        pipe.lrange(_artifacts_key(session_id), 0, -1)
+        exists, artifacts = await pipe.execute()
+    
+    if not exists:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return [orjson.loads(a) for a in artifacts]
+
+
 # Endpoints
 
 @router.post("/chat", response_model=ChatResponse)
@@ -75,46 +207,42 @@ async def chat(message: ChatMessage) -> ChatResponse:
     
     try:
         # Initialize session if new
-        if session_id not in sessions:
-            sessions[session_id] = {
-                "id": session_id,
-                "created_at": datetime.now().isoformat(),
-                "messages": [],
-                "artifacts": []
-            }
+        await _ensure_session(session_id)
         
         # Add user message to history
-        sessions[session_id]["messages"].append({
+        await _append_to_session(session_id, [{
             "role": "user",
             "content": message.content,
             "timestamp": datetime.now().isoformat()
-        })
+        }])
         
         # Execute the agent
-        response: AgentResponse = await agent.execute(
-            user_message=message.content,
-            session_id=session_id,
-            context=message.context
-        )
+        async with LLM_SEM:
+            response: AgentResponse = await agent.execute(
+                user_message=message.content,
+                session_id=session_id,
+                context=message.context
+            )
         
-        # Add assistant message to history
-        sessions[session_id]["messages"].append({
-            "role": "assistant",
-            "content": response.message,
-            "timestamp": datetime.now().isoformat()
-        })
+        # Serialize artifacts once for both storage and the response
+        artifact_dicts = [artifact.to_dict() for artifact in response.artifacts]
         
-        # Store artifacts
-        for artifact in response.artifacts:
-            sessions[session_id]["artifacts"].append(artifact.to_dict())
-        
-        sessions[session_id]["last_activity"] = datetime.now().isoformat()
+        # Add assistant message and artifacts to history
+        await _append_to_session(
+            session_id,
+            [{
+                "role": "assistant",
+                "content": response.message,
+                "timestamp": datetime.now().isoformat()
+            }],
+            artifact_dicts
+        )
         
         return ChatResponse(
             session_id=session_id,
             message=response.message,
             success=response.success,
-            artifacts=[a.to_dict() for a in response.artifacts],
+            artifacts=artifact_dicts,
             steps=[s.to_dict() for s in response.steps],
             duration_ms=response.total_duration_ms
         )
@@ -124,55 +252,137 @@ async def chat(message: ChatMessage) -> ChatResponse:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat/stream")
+async def chat_stream(message: ChatMessage) -> StreamingResponse:
+    """
+    Send a message to the AI agent and stream the execution as Server-Sent Events.
+    
+    Each event yielded by the agent (start, step, token, artifact, complete, error)
+    is sent as a `data: <json>` frame as soon as it is produced, so clients see
+    the first token without waiting for the full response.
+    """
+    session_id = message.session_id or str(uuid.uuid4())
+    
+    logger.info(f"💬 Chat stream request - Session: {session_id}")
+    logger.info(f"📝 Message: {message.content[:100]}...")
+    
+    # Initialize session if new
+    await _ensure_session(session_id)
+    
+    # Add user message to history
+    await _append_to_session(session_id, [{
+        "role": "user",
+        "content": message.content,
+        "timestamp": datetime.now().isoformat()
+    }])
+    
+    async def sse_gen():
+        final_message = None
+        artifacts: List[Dict[str, Any]] = []
+        
+        try:
+            async with LLM_SEM:
+                async for event in agent.stream_execute(message.content, session_id, message.context):
+                    if isinstance(event, ArtifactEvent):
+                        artifacts.append(event.artifact)
+                    elif isinstance(event, StepEvent) and event.step["type"] == "final_answer":
+                        final_message = event.step["content"]
+                    
+                    yield b"data: " + _event_encoder.encode(event) + b"\n\n"
+        
+        finally:
+            # Persist the session state once the stream completes (or the client disconnects)
+            messages = []
+            if final_message is not None:
+                messages.append({
+                    "role": "assistant",
+                    "content": final_message,
+                    "timestamp": datetime.now().isoformat()
+                })
+            await _append_to_session(session_id, messages, artifacts)
+    
+    return StreamingResponse(
+        sse_gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/sessions")
 async def list_sessions() -> List[SessionInfo]:
     """List all active sessions"""
+    # Drop index entries whose sessions have expired, then read the rest
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.zremrangebyscore(SESSION_INDEX_KEY, "-inf", time.time() - settings.session_ttl)
+        pipe.zrange(SESSION_INDEX_KEY, 0, -1)
+        _, session_ids = await pipe.execute()
+    
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for session_id in session_ids:
+            pipe.hgetall(_session_key(session_id))
+        results = await pipe.execute()
+    
     return [
         SessionInfo(
             session_id=s["id"],
             created_at=s["created_at"],
-            message_count=len(s["messages"]),
+            message_count=int(s.get("message_count", 0)),
             last_activity=s.get("last_activity", s["created_at"])
         )
-        for s in sessions.values()
+        for s in results
+        if s  # Expired since its last index update
     ]
 
 
 @router.get("/sessions/{session_id}")
-async def get_session(session_id: str) -> Dict[str, Any]:
+async def get_session(session_id: str) -> ORJSONResponse:
     """Get session details including message history"""
-    if session_id not in sessions:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(_session_key(session_id))
+        pipe.lrange(_messages_key(session_id), 0, -1)
+        pipe.lrange(_artifacts_key(session_id), 0, -1)
+        session, messages, artifacts = await pipe.execute()
+    
+    if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return sessions[session_id]
+    # Returned directly so the history skips FastAPI's jsonable_encoder walk
+    return ORJSONResponse({
+        **session,
+        "message_count": int(session.get("message_count", 0)),
+        "messages": [orjson.loads(m) for m in messages],
+        "artifacts": [orjson.loads(a) for a in artifacts]
+    })
 
 
 @router.delete("/sessions/{session_id}")
 async def delete_session(session_id: str) -> Dict[str, str]:
     """Delete a session"""
-    if session_id not in sessions:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(
+            _session_key(session_id),
+            _messages_key(session_id),
+            _artifacts_key(session_id)
+        )
+        pipe.zrem(SESSION_INDEX_KEY, session_id)
+        deleted, _ = await pipe.execute()
+    
+    if not deleted:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del sessions[session_id]
     return {"status": "deleted", "session_id": session_id}
 
 
 @router.get("/sessions/{session_id}/artifacts")
-async def get_session_artifacts(session_id: str) -> List[Dict[str, Any]]:
+async def get_session_artifacts(session_id: str) -> ORJSONResponse:
     """Get all artifacts from a session"""
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    return sessions[session_id].get("artifacts", [])
+    return ORJSONResponse(await _get_session_artifacts(session_id))
 
 
 @router.get("/sessions/{session_id}/artifacts/{artifact_id}")
 async def get_artifact(session_id: str, artifact_id: str) -> Dict[str, Any]:
     """Get a specific artifact"""
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    artifacts = sessions[session_id].get("artifacts", [])
+    artifacts = await _get_session_artifacts(session_id)
     for artifact in artifacts:
         if artifact["id"] == artifact_id:
             return artifact
@@ -181,27 +391,33 @@ async def get_artifact(session_id: str, artifact_id: str) -> Dict[str, Any]:
 
 
 @router.get("/tools")
-async def list_tools() -> Dict[str, Any]:
+async def list_tools() -> Response:
     """List available tools and their descriptions"""
-    tools = await agent.get_tools()
-    
-    tool_info = []
-    for toolkit in tools:
-        tool_info.append({
-            "name": toolkit.name,
-            "functions": [
-                {
-                    "name": name,
-                    "description": func.__doc__ or ""
-                }
-                for name, func in toolkit.functions.items()
-            ] if hasattr(toolkit, 'functions') else []
+    global _tools_manifest
+    
+    # The toolset is fixed for the lifetime of the process, so build it once
+    if _tools_manifest is None:
+        tools = await agent.get_tools()
+        
+        tool_info = []
+        for toolkit in tools:
+            tool_info.append({
+                "name": toolkit.name,
+                "functions": [
+                    {
+                        "name": name,
+                        "description": func.__doc__ or ""
+                    }
+                    for name, func in toolkit.functions.items()
+                ] if hasattr(toolkit, 'functions') else []
+            })
+        
+        _tools_manifest = orjson.dumps({
+            "agent_name": agent.name,
+            "tools": tool_info
         })
     
-    return {
-        "agent_name": agent.name,
-        "tools": tool_info
-    }
+    return Response(content=_tools_manifest, media_type="application/json")
 
 
 @router.post("/research")
@@ -209,7 +425,7 @@ async def research(query: str) -> Dict[str, Any]:
     """Quick research endpoint"""
     logger.info(f"🔍 Research request: {query}")
     
-    return await agent.research(query)
+    return await _cached_submit("research", research_batcher, query)
 
 
 @router.post("/analyze")
@@ -217,7 +433,7 @@ async def analyze(data_source: str, request: str) -> Dict[str, Any]:
     """Quick data analysis endpoint"""
     logger.info(f"📊 Analysis request: {data_source}")
     
-    return await agent.analyze_data(data_source, request)
+    return await _cached_submit("analyze", analysis_batcher, data_source, request)
 
 
 @router.post("/document")
@@ -225,4 +441,4 @@ async def create_document(doc_type: str, requirements: str) -> Dict[str, Any]:
     """Quick document creation endpoint"""
     logger.info(f"📝 Document request: {doc_type}")
     
-    return await agent.create_document(doc_type, requirements)
+    return await _cached_submit("document", document_batcher, doc_type, requirements)
@@ -2,49 +2,235 @@
 WebSocket API - Real-time communication for streaming agent responses
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable, List, Set, Union
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from loguru import logger
-import json
+import msgspec
+import orjson
 import asyncio
+import sys
 import uuid
 
-from agents import create_general_agent
+from agents import create_general_agent, AgentEvent, TokenEvent
+from config import settings
 
 router = APIRouter()
 
+# Clients that offer this subprotocol get MessagePack binary frames instead of JSON text
+MSGPACK_SUBPROTOCOL = "agent.v1.msgpack"
+
+# Binary frames start with a one-byte type; only FRAME_MESSAGE carries a
+# MessagePack payload, so keepalives and cancels are handled without decoding
+FRAME_MESSAGE = 0x00
+FRAME_PING = 0x01
+FRAME_PONG = 0x02
+FRAME_CANCEL = 0x03
+
+_MESSAGE_HEADER = bytes([FRAME_MESSAGE])
+_PONG_FRAME = bytes([FRAME_PONG])
+_CANCEL_MESSAGE = {"type": "cancel"}
+
+_msgpack_encoder = msgspec.msgpack.Encoder()
+_msgpack_decoder = msgspec.msgpack.Decoder()
+_json_encoder = msgspec.json.Encoder()
+
+# Control messages are plain dicts; agent events are encoded straight from their
+# Structs; bytes are complete binary frames (pongs) sent as they are
+OutboundMessage = Union[Dict[str, Any], AgentEvent, bytes]
+
+
+async def _accept(websocket: WebSocket) -> bool:
+    """Accept a connection, negotiating MessagePack framing if the client offers it"""
+    binary = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL if binary else None)
+    return binary
+
+
+def _pack(message: OutboundMessage) -> bytearray:
+    """Encode a message as a binary FRAME_MESSAGE frame"""
+    frame = bytearray(_MESSAGE_HEADER)
+    _msgpack_encoder.encode_into(message, frame, 1)
+    return frame
+
+
+async def _send(websocket: WebSocket, message: OutboundMessage, binary: bool):
+    """Send a message using the connection's framing"""
+    if binary:
+        await websocket.send_bytes(_pack(message))
+    else:
+        await websocket.send_text(_json_encoder.encode(message).decode())
+
+
+def _coalesce(messages: List[OutboundMessage]) -> OutboundMessage:
+    """Merge runs of token events and wrap multiple events into one batch frame"""
+    merged: List[OutboundMessage] = []
+    tokens: List[str] = []
+    
+    for message in messages:
+        if isinstance(message, TokenEvent):
+            tokens.append(message.content)
+            continue
+        if tokens:
+            merged.append(TokenEvent(content="".join(tokens)))
+            tokens = []
+        merged.append(message)
+    
+    if tokens:
+        merged.append(TokenEvent(content="".join(tokens)))
+    
+    if len(merged) == 1:
+        return merged[0]
+    return {"type": "batch", "events": merged}
+
+
+async def _send_queued(websocket: WebSocket, messages: List[OutboundMessage], binary: bool):
+    """Send drained queue messages in order, coalescing the runs between raw frames"""
+    run: List[OutboundMessage] = []
+    for message in messages:
+        if not isinstance(message, bytes):
+            run.append(message)
+            continue
+        if run:
+            await _send(websocket, _coalesce(run), binary)
+            run = []
+        await websocket.send_bytes(message)
+    
+    if run:
+        await _send(websocket, _coalesce(run), binary)
+
+
+async def _receive(
+    websocket: WebSocket,
+    binary: bool,
+    send_pong: Callable[[], Awaitable[None]]
+) -> Any:
+    """Receive and decode a message, raising ValueError on malformed payloads"""
+    while binary:
+        data = await websocket.receive_bytes()
+        if not data:
+            raise ValueError("Empty frame")
+        
+        frame_type = data[0]
+        if frame_type == FRAME_PING:
+            # Answered right here, without going through the message loop
+            await send_pong()
+            continue
+        if frame_type == FRAME_CANCEL:
+            return _CANCEL_MESSAGE
+        if frame_type != FRAME_MESSAGE:
+            raise ValueError(f"Unknown frame type: {frame_type}")
+        
+        try:
+            return _msgpack_decoder.decode(memoryview(data)[1:])
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    
+    data = await websocket.receive_text()
+    return orjson.loads(data)  # orjson.JSONDecodeError is a ValueError
+
 
 class ConnectionManager:
     """Manage WebSocket connections"""
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        self.binary_framing: Dict[str, bool] = {}
         self.agents: Dict[str, Any] = {}
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.writers: Dict[str, asyncio.Task] = {}
+        
+        # Sessions whose writer hit a send error; further sends raise instead of queueing
+        self.closed: Set[str] = set()
     
     async def connect(self, websocket: WebSocket, session_id: str):
         """Accept and store a WebSocket connection"""
-        await websocket.accept()
+        self.binary_framing[session_id] = await _accept(websocket)
         self.active_connections[session_id] = websocket
         self.agents[session_id] = create_general_agent()
+        
+        # Outbound messages are queued and sent by a dedicated writer task so
+        # producers never wait on socket flushes (until the queue fills up)
+        self.queues[session_id] = asyncio.Queue(maxsize=settings.ws_send_queue_size)
+        self.writers[session_id] = asyncio.create_task(self._writer(session_id))
         logger.info(f"🔌 WebSocket connected: {session_id}")
     
     def disconnect(self, session_id: str):
         """Remove a WebSocket connection"""
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
-        if session_id in self.agents:
-            del self.agents[session_id]
+        self.active_connections.pop(session_id, None)
+        self.binary_framing.pop(session_id, None)
+        self.agents.pop(session_id, None)
+        self.queues.pop(session_id, None)
+        self.closed.discard(session_id)
+        
+        writer = self.writers.pop(session_id, None)
+        if writer is not None:
+            writer.cancel()
         logger.info(f"🔌 WebSocket disconnected: {session_id}")
     
-    async def send_message(self, session_id: str, message: Dict[str, Any]):
-        """Send a message to a specific connection"""
-        if session_id in self.active_connections:
-            await self.active_connections[session_id].send_json(message)
+    async def send_message(self, session_id: str, message: OutboundMessage):
+        """Queue a message for a specific connection, raising if its socket has failed"""
+        if session_id in self.closed:
+            raise WebSocketDisconnect(code=1006)
+        
+        queue = self.queues.get(session_id)
+        if queue is not None:
+            # Waits only when the queue is full, bounding per-connection memory
+            await queue.put(message)
+    
+    async def _writer(self, session_id: str):
+        """Drain a connection's outbound queue onto its socket"""
+        websocket = self.active_connections[session_id]
+        queue = self.queues[session_id]
+        binary = self.binary_framing[session_id]
+        
+        try:
+            while True:
+                messages = [await queue.get()]
+                
+                # Give a slow producer a moment to add more before sending
+                if queue.empty():
+                    await asyncio.sleep(settings.ws_coalesce_ms / 1000)
+                
+                while not queue.empty():
+                    messages.append(queue.get_nowait())
+                
+                await _send_queued(websocket, messages, binary)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"WebSocket writer stopped [{session_id}]: {e}")
+            self.closed.add(session_id)
+            
+            # Release producers blocked on the full queue; their next send raises
+            while not queue.empty():
+                queue.get_nowait()
+            
+            try:
+                await websocket.close()
+            except Exception:
+                pass
     
     async def broadcast(self, message: Dict[str, Any]):
         """Broadcast message to all connections"""
-        for connection in self.active_connections.values():
-            await connection.send_json(message)
+        connections = list(self.active_connections.items())
+        framings = {self.binary_framing[session_id] for session_id, _ in connections}
+        
+        # Serialize once per framing rather than once per connection
+        text = orjson.dumps(message).decode() if False in framings else None
+        packed = _pack(message) if True in framings else None
+        
+        results = await asyncio.gather(
+            *(
+                connection.send_bytes(packed) if self.binary_framing[session_id]
+                else connection.send_text(text)
+                for session_id, connection in connections
+            ),
+            return_exceptions=True
+        )
+        
+        for (session_id, _), result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Broadcast to {session_id} failed: {result}")
 
 
 manager = ConnectionManager()
@@ -61,13 +247,22 @@ async def websocket_chat(websocket: WebSocket, session_id: Optional[str] = None)
         "content": "User message here"
     }
     
-    Response format (outgoing):
+    Response format (outgoing), with the event's fields alongside its type:
     {
         "type": "start" | "step" | "token" | "artifact" | "complete" | "error",
-        "data": {...}
+        ...
     }
+    
+    Events that are ready together may arrive as one
+    {"type": "batch", "events": [...]} frame, with consecutive tokens merged.
+    
+    Frames are JSON text by default. Clients that request the
+    "agent.v1.msgpack" subprotocol exchange binary frames instead: a one-byte
+    frame type (0x00 message, 0x01 ping, 0x02 pong, 0x03 cancel) followed,
+    for messages only, by the MessagePack-encoded payload.
     """
-    session_id = session_id or str(uuid.uuid4())
+    # Interned so every per-connection lookup below compares by identity first
+    session_id = sys.intern(session_id or str(uuid.uuid4()))
     
     await manager.connect(websocket, session_id)
     
@@ -81,14 +276,17 @@ async def websocket_chat(websocket: WebSocket, session_id: Optional[str] = None)
         
         while True:
             # Receive message
-            data = await websocket.receive_text()
-            
             try:
-                message = json.loads(data)
-            except json.JSONDecodeError:
+                message = await _receive(
+                    websocket,
+                    manager.binary_framing[session_id],
+                    # Pongs go through the writer queue so only the writer sends
+                    lambda: manager.send_message(session_id, _PONG_FRAME)
+                )
+            except ValueError:
                 await manager.send_message(session_id, {
                     "type": "error",
-                    "message": "Invalid JSON format"
+                    "message": "Invalid message format"
                 })
                 continue
             
@@ -111,10 +309,7 @@ async def websocket_chat(websocket: WebSocket, session_id: Optional[str] = None)
                 
                 try:
                     async for event in agent.stream_execute(content, session_id):
-                        await manager.send_message(session_id, {
-                            "type": event["type"],
-                            "data": event
-                        })
+                        await manager.send_message(session_id, event)
                         
                 except Exception as e:
                     logger.error(f"Agent error: {e}")
@@ -149,23 +344,22 @@ async def websocket_stream(websocket: WebSocket):
     General streaming endpoint for server-side events.
     Useful for monitoring agent activity across sessions.
     """
-    await websocket.accept()
+    binary = await _accept(websocket)
     
     try:
         while True:
             # Keep connection alive and handle incoming messages
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            message = await _receive(websocket, binary, lambda: websocket.send_bytes(_PONG_FRAME))
             
             if message.get("type") == "subscribe":
                 # Subscribe to events
-                await websocket.send_json({
+                await _send(websocket, {
                     "type": "subscribed",
                     "topics": message.get("topics", [])
-                })
+                }, binary)
             
             elif message.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
+                await _send(websocket, {"type": "pong"}, binary)
     
     except WebSocketDisconnect:
         logger.info("Stream WebSocket disconnected")
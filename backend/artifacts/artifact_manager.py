@@ -3,55 +3,87 @@ Artifact Manager - Handle creation, storage, and retrieval of artifacts
 """
 
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass, field
 from datetime import datetime
+import time
 import uuid
 import os
 import json
+import aiofiles
+import msgspec
 from loguru import logger
 
 from config import settings
 
 
-@dataclass
-class ArtifactData:
+# File extensions by artifact type; code artifacts resolve via _CODE_EXT
+_TYPE_EXT = {
+    "document": ".md",
+    "html": ".html",
+    "chart": ".json",
+    "table": ".csv",
+    "text": ".txt"
+}
+
+_CODE_EXT = {
+    "python": ".py",
+    "javascript": ".js",
+    "typescript": ".ts",
+    "java": ".java",
+    "cpp": ".cpp",
+    "c": ".c",
+    "csharp": ".cs",
+    "go": ".go",
+    "rust": ".rs",
+    "ruby": ".rb",
+    "php": ".php",
+    "swift": ".swift",
+    "kotlin": ".kt",
+    "html": ".html",
+    "css": ".css",
+    "sql": ".sql",
+    "shell": ".sh",
+    "bash": ".sh",
+    "powershell": ".ps1",
+    "yaml": ".yaml",
+    "json": ".json",
+    "xml": ".xml"
+}
+
+_FILENAME_TABLE = str.maketrans({" ": "_"})
+
+
+def _format_ts(ts: float) -> str:
+    """Format a unix timestamp as an ISO 8601 string"""
+    return datetime.fromtimestamp(ts).isoformat()
+
+
+# Structs are slotted already, so instances carry no per-object __dict__
+class ArtifactData(msgspec.Struct):
     """Represents an artifact with all its data"""
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = msgspec.field(default_factory=lambda: str(uuid.uuid4()))
     type: str = "text"  # code, document, chart, table, html, image
     title: str = ""
     content: str = ""
     language: Optional[str] = None
     session_id: Optional[str] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
+    metadata: Dict[str, Any] = msgspec.field(default_factory=dict)
+    # Unix seconds; only formatted when the artifact is serialized
+    created_at: float = msgspec.field(default_factory=time.time)
+    updated_at: float = msgspec.field(default_factory=time.time)
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "type": self.type,
-            "title": self.title,
-            "content": self.content,
-            "language": self.language,
-            "session_id": self.session_id,
-            "metadata": self.metadata,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat()
-        }
+        data = msgspec.to_builtins(self)
+        data["created_at"] = _format_ts(self.created_at)
+        data["updated_at"] = _format_ts(self.updated_at)
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ArtifactData":
-        return cls(
-            id=data.get("id", str(uuid.uuid4())),
-            type=data.get("type", "text"),
-            title=data.get("title", ""),
-            content=data.get("content", ""),
-            language=data.get("language"),
-            session_id=data.get("session_id"),
-            metadata=data.get("metadata", {}),
-            created_at=datetime.fromisoformat(data["created_at"]) if "created_at" in data else datetime.now(),
-            updated_at=datetime.fromisoformat(data["updated_at"]) if "updated_at" in data else datetime.now()
-        )
+        data = dict(data)
+        for key in ("created_at", "updated_at"):
+            if isinstance(data.get(key), str):
+                data[key] = datetime.fromisoformat(data[key]).timestamp()
+        return msgspec.convert(data, cls)
 
 
 class ArtifactManager:
@@ -69,6 +101,11 @@ class ArtifactManager:
     def __init__(self, storage_dir: Optional[str] = None):
         self.storage_dir = storage_dir or settings.artifacts_dir
         self.artifacts: Dict[str, ArtifactData] = {}
+        
+        # Secondary indexes so per-session and per-type lookups don't scan everything
+        self._by_session: Dict[str, Dict[str, ArtifactData]] = {}
+        self._by_type: Dict[str, Dict[str, ArtifactData]] = {}
+        
         self._ensure_storage_dir()
     
     def _ensure_storage_dir(self):
@@ -109,6 +146,9 @@ class ArtifactManager:
         )
         
         self.artifacts[artifact.id] = artifact
+        self._by_type.setdefault(artifact.type, {})[artifact.id] = artifact
+        if artifact.session_id is not None:
+            self._by_session.setdefault(artifact.session_id, {})[artifact.id] = artifact
         
         logger.info(f"📦 Created artifact: {artifact.title} ({artifact.type})")
         
@@ -138,7 +178,7 @@ class ArtifactManager:
         if metadata is not None:
             artifact.metadata.update(metadata)
         
-        artifact.updated_at = datetime.now()
+        artifact.updated_at = time.time()
         
         logger.info(f"✏️ Updated artifact: {artifact.title}")
         
@@ -149,45 +189,51 @@ class ArtifactManager:
         if artifact_id in self.artifacts:
             artifact = self.artifacts[artifact_id]
             del self.artifacts[artifact_id]
+            self._unindex(artifact)
             logger.info(f"🗑️ Deleted artifact: {artifact.title}")
             return True
         return False
     
+    def _unindex(self, artifact: ArtifactData):
+        """Remove an artifact from the secondary indexes"""
+        for index, key in ((self._by_type, artifact.type), (self._by_session, artifact.session_id)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(artifact.id, None)
+                if not bucket:
+                    del index[key]
+    
     def list_all(self, session_id: Optional[str] = None) -> List[ArtifactData]:
         """List all artifacts, optionally filtered by session"""
-        artifacts = list(self.artifacts.values())
-        
         if session_id:
-            artifacts = [a for a in artifacts if a.session_id == session_id]
+            artifacts = self._by_session.get(session_id, {}).values()
+        else:
+            artifacts = self.artifacts.values()
         
         return sorted(artifacts, key=lambda a: a.created_at, reverse=True)
     
     def list_by_type(self, artifact_type: str) -> List[ArtifactData]:
         """List artifacts of a specific type"""
-        return [a for a in self.artifacts.values() if a.type == artifact_type]
+        return list(self._by_type.get(artifact_type, {}).values())
     
-    def save_to_file(self, artifact_id: str) -> Optional[str]:
+    async def save_to_file(self, artifact_id: str) -> Optional[str]:
         """Save an artifact to a file"""
         artifact = self.get(artifact_id)
         if not artifact:
             return None
         
         # Determine file extension
-        extensions = {
-            "code": self._get_code_extension(artifact.language),
-            "document": ".md",
-            "html": ".html",
-            "chart": ".json",
-            "table": ".csv",
-            "text": ".txt"
-        }
+        if artifact.type == "code":
+            ext = self._get_code_extension(artifact.language)
+        else:
+            ext = _TYPE_EXT.get(artifact.type, ".txt")
         
-        ext = extensions.get(artifact.type, ".txt")
-        filename = f"{artifact.id}_{artifact.title.replace(' ', '_')}{ext}"
+        filename = f"{artifact.id}_{artifact.title.translate(_FILENAME_TABLE)}{ext}"
         filepath = os.path.join(self.storage_dir, filename)
         
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(artifact.content)
+        # Write off the event loop in one buffered call
+        async with aiofiles.open(filepath, "wb", buffering=1 << 20) as f:
+            await f.write(artifact.content.encode("utf-8"))
         
         logger.info(f"💾 Saved artifact to: {filepath}")
         
@@ -195,32 +241,7 @@ class ArtifactManager:
     
     def _get_code_extension(self, language: Optional[str]) -> str:
         """Get file extension for a programming language"""
-        extensions = {
-            "python": ".py",
-            "javascript": ".js",
-            "typescript": ".ts",
-            "java": ".java",
-            "cpp": ".cpp",
-            "c": ".c",
-            "csharp": ".cs",
-            "go": ".go",
-            "rust": ".rs",
-            "ruby": ".rb",
-            "php": ".php",
-            "swift": ".swift",
-            "kotlin": ".kt",
-            "html": ".html",
-            "css": ".css",
-            "sql": ".sql",
-            "shell": ".sh",
-            "bash": ".sh",
-            "powershell": ".ps1",
-            "yaml": ".yaml",
-            "json": ".json",
-            "xml": ".xml"
-        }
-        
-        return extensions.get(language.lower() if language else "", ".txt")
+        return _CODE_EXT.get(language.lower() if language else "", ".txt")
     
     def export_session(self, session_id: str) -> Dict[str, Any]:
         """Export all artifacts from a session"""
@@ -229,19 +250,17 @@ class ArtifactManager:
         return {
             "session_id": session_id,
             "artifact_count": len(artifacts),
-            "artifacts": [a.to_dict() for a in artifacts],
-            "exported_at": datetime.now().isoformat()
+            "artifacts": [artifact.to_dict() for artifact in artifacts],
+            "exported_at": _format_ts(time.time())
         }
     
     def clear_session(self, session_id: str) -> int:
         """Clear all artifacts from a session"""
-        artifacts_to_delete = [
-            aid for aid, a in self.artifacts.items()
-            if a.session_id == session_id
-        ]
+        artifacts_to_delete = list(self._by_session.get(session_id, {}).values())
         
-        for aid in artifacts_to_delete:
-            del self.artifacts[aid]
+        for artifact in artifacts_to_delete:
+            del self.artifacts[artifact.id]
+            self._unindex(artifact)
         
         logger.info(f"🧹 Cleared {len(artifacts_to_delete)} artifacts from session {session_id}")
         
@@ -28,15 +28,37 @@ class Settings(BaseSettings):
     # Agent Configuration
     max_iterations: int = 10  # Max ReAct loop iterations
     thought_timeout: int = 30  # Seconds
+    max_tool_output_chars: int = 2000  # Tool output kept per execution step
+    max_concurrency: int = 4  # Concurrent agent executions sharing the LLM
+    batch_max_size: int = 8  # Max requests dispatched together per micro-batch
+    batch_window_ms: int = 10  # How long to wait for a micro-batch to fill
+    response_cache_size: int = 1024  # Cached /research, /analyze, /document responses
+    response_cache_ttl: int = 3600  # Seconds
+    tool_thread_workers: int = 32  # Threads for blocking tool calls
+    
+    # WebSocket Configuration
+    ws_send_queue_size: int = 256  # Outbound messages buffered per connection
+    ws_coalesce_ms: int = 5  # Window for merging queued events into one frame
     
     # Browser Tool Configuration
     browser_headless: bool = True
     browser_timeout: int = 30000  # milliseconds
+    browser_max_pages: int = 4  # Pages in the shared Playwright page pool
+    browser_max_page_bytes: int = 2_000_000  # Page bodies are cut off past this size
+    browser_cache_size: int = 512  # Cached page tool results
+    browser_cache_ttl: int = 300  # Seconds
+    
+    # Document Tool Configuration
+    document_preview_chars: int = 500  # Content preview returned by create_document
     
     # Artifact Storage
     artifacts_dir: str = "./artifacts_storage"
     max_artifact_size_mb: int = 10
     
+    # Session Storage
+    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    session_ttl: int = 3600  # Seconds of inactivity before a session expires
+    
     # CORS Configuration
     cors_origins: list = ["http://localhost:5173", "http://localhost:3000"]
     
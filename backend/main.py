@@ -3,14 +3,18 @@ AI Agents Platform - Main Entry Point
 """
 
 import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 import uvicorn
 
 from config import settings
-from api.routes import router as api_router
+from api.routes import router as api_router, redis_client
 from api.websocket import router as ws_router
+from tools.browser_tool import page_pool
 
 # Configure logging
 logger.add(
@@ -25,7 +29,8 @@ app = FastAPI(
     title=settings.app_name,
     description="AI Agents Platform - Execute complex tasks with AI agents",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -70,6 +75,11 @@ async def startup_event():
     logger.info(f"📦 Model: {settings.model_name}")
     logger.info(f"🔧 Debug mode: {settings.debug}")
     
+    # Blocking tool calls are pushed onto the default executor
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=settings.tool_thread_workers)
+    )
+    
     # Create artifacts directory
     import os
     os.makedirs(settings.artifacts_dir, exist_ok=True)
@@ -80,6 +90,8 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("👋 Shutting down AI Agents Platform")
+    await redis_client.aclose()
+    await page_pool.close()
 
 
 if __name__ == "__main__":
@@ -87,5 +99,9 @@ if __name__ == "__main__":
         "main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets"
     )
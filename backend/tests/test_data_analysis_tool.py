@@ -0,0 +1,37 @@
+"""
+Tests for the data analysis toolkit helpers
+"""
+
+import orjson
+import pandas as pd
+
+from tools.data_analysis_tool import _dumps, _export_chunks, _table_rows
+
+
+def _export(df, format):
+    return b"".join(_export_chunks(df, format)).decode()
+
+
+def test_csv_export_handles_mixed_object_column():
+    df = pd.DataFrame({"a": [1, "x", None]})
+    
+    assert _export(df, "csv") == df.to_csv(index=False)
+
+
+def test_csv_export_keeps_pandas_formatting():
+    df = pd.DataFrame({"name": ["a", "b"], "value": [100.0, 2.5]})
+    
+    assert _export(df, "csv") == "name,value\na,100.0\nb,2.5\n"
+
+
+def test_csv_export_of_empty_frame_is_header_only():
+    assert _export(pd.DataFrame({"a": [], "b": []}), "csv") == "a,b\n"
+
+
+def test_table_rows_keep_int_keys_next_to_floats():
+    df = pd.DataFrame({"key": [25, 2**62 + 1], "mean": [1.5, 2.0]})
+    
+    rows = orjson.loads(_dumps(_table_rows(df)))
+    
+    assert rows == [[25, 1.5], [2**62 + 1, 2.0]]
+    assert all(type(key) is int for key, _ in rows)
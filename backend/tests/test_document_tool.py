@@ -0,0 +1,28 @@
+"""
+Tests for the document toolkit helpers
+"""
+
+import re
+
+import pytest
+
+from tools.document_tool import _strip_markdown
+
+
+def _baseline_strip(content):
+    content = re.sub(r'#{1,6}\s', '', content)
+    content = re.sub(r'\*\*([^*]+)\*\*', r'\1', content)
+    return re.sub(r'\*([^*]+)\*', r'\1', content)
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("# Title\n\nplain", "Title\n\nplain"),
+    ("**bold** and *italic*", "bold and italic"),
+    ("***x***", "x"),
+    ("**bold *italic* bold**", "*bold italic bold*"),
+    ("*a **b** c*", "a b c"),
+    ("**a# b**", "ab")
+])
+def test_strip_markdown_matches_sequential_passes(content, expected):
+    assert _strip_markdown(content) == expected
+    assert _strip_markdown(content) == _baseline_strip(content)
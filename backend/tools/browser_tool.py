@@ -3,15 +3,110 @@ Browser Tool - Web browsing and research capabilities
 Uses Playwright for browser automation
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from urllib.parse import urljoin
 import asyncio
-import json
+import base64
+import re
+import httpx
+from cachetools import TTLCache
 from loguru import logger
+from selectolax.lexbor import LexborHTMLParser
 
 from agno.tools import Toolkit, tool
 
 from config import settings
+from tools.serialization import dumps as _dumps
+
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def _cacheable(status: int) -> bool:
+    """Only successful responses are cached; errors and rate limits may be transient"""
+    return 200 <= status < 300
+
+
+class PagePool:
+    """
+    Process-wide Chromium instance with a fixed pool of reusable pages.
+    
+    The browser is launched on first use and shared by every BrowserToolkit,
+    so concurrent sessions borrow pages instead of each launching Chromium.
+    """
+    
+    def __init__(self, max_pages: int):
+        self.max_pages = max_pages
+        self._lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+        self._pages: Optional[asyncio.Queue] = None
+    
+    async def _start(self):
+        """Launch the browser and open one page per pooled context"""
+        async with self._lock:
+            if self._browser is not None:
+                return
+            
+            playwright = browser = None
+            try:
+                from playwright.async_api import async_playwright
+                playwright = await async_playwright().start()
+                browser = await playwright.chromium.launch(
+                    headless=settings.browser_headless
+                )
+                
+                pages: asyncio.Queue = asyncio.Queue()
+                for _ in range(self.max_pages):
+                    context = await browser.new_context(
+                        viewport={"width": 1280, "height": 720},
+                        user_agent=_USER_AGENT
+                    )
+                    pages.put_nowait(await context.new_page())
+            except Exception as e:
+                logger.error(f"Failed to initialize browser: {e}")
+                # Leave the pool unstarted so the next acquire retries from scratch
+                if browser is not None:
+                    await browser.close()
+                if playwright is not None:
+                    await playwright.stop()
+                raise
+            
+            self._playwright = playwright
+            self._browser = browser
+            self._pages = pages
+            logger.info(f"🌐 Browser initialized with {self.max_pages} pages")
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """Borrow a page, waiting if all pages are in use"""
+        if self._pages is None:
+            await self._start()
+        
+        pages = self._pages
+        page = await pages.get()
+        try:
+            yield page
+        finally:
+            pages.put_nowait(page)
+    
+    async def close(self):
+        """Close the browser and drop the pool"""
+        async with self._lock:
+            if self._browser is None:
+                return
+            
+            await self._browser.close()
+            await self._playwright.stop()
+            self._browser = None
+            self._playwright = None
+            self._pages = None
+            logger.info("🌐 Browser closed")
+
+
+page_pool = PagePool(settings.browser_max_pages)
 
 
 @dataclass
@@ -45,9 +140,13 @@ class BrowserToolkit(Toolkit):
     
     def __init__(self):
         super().__init__(name="browser")
-        self.browser = None
-        self.context = None
-        self.page = None
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Serialized results of page tools, keyed by (tool, url, argument)
+        self._page_cache: TTLCache = TTLCache(
+            maxsize=settings.browser_cache_size,
+            ttl=settings.browser_cache_ttl
+        )
         
         # Register tools
         self.register(self.web_search)
@@ -58,36 +157,40 @@ class BrowserToolkit(Toolkit):
         self.register(self.fill_form)
         self.register(self.get_page_links)
     
-    async def _ensure_browser(self):
-        """Ensure browser is initialized"""
-        if self.browser is None:
-            try:
-                from playwright.async_api import async_playwright
-                self.playwright = await async_playwright().start()
-                self.browser = await self.playwright.chromium.launch(
-                    headless=settings.browser_headless
-                )
-                self.context = await self.browser.new_context(
-                    viewport={"width": 1280, "height": 720},
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                )
-                self.page = await self.context.new_page()
-                logger.info("🌐 Browser initialized")
-            except Exception as e:
-                logger.error(f"Failed to initialize browser: {e}")
-                raise
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=settings.browser_timeout / 1000,
+                follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                headers={"User-Agent": _USER_AGENT}
+            )
+        return self._client
     
-    async def _close_browser(self):
-        """Close the browser"""
-        if self.browser:
-            await self.browser.close()
-            await self.playwright.stop()
-            self.browser = None
-            self.context = None
-            self.page = None
+    async def _fetch(self, url: str) -> Tuple[str, int]:
+        """Fetch a page body, truncated after `browser_max_page_bytes`"""
+        max_bytes = settings.browser_max_page_bytes
+        
+        async with self._get_client().stream("GET", url) as response:
+            buf = bytearray()
+            async for chunk in response.aiter_bytes():
+                buf.extend(chunk)
+                if len(buf) >= max_bytes:
+                    break
+            
+            text = bytes(buf[:max_bytes]).decode(response.encoding or "utf-8", errors="replace")
+            return text, response.status_code
+    
+    async def _close_client(self):
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     @tool(description="Search the web for information. Returns a list of search results with titles, URLs, and snippets.")
-    def web_search(self, query: str, num_results: int = 5) -> str:
+    async def web_search(self, query: str, num_results: int = 5) -> str:
         """
         Search the web for information.
         
@@ -101,17 +204,20 @@ class BrowserToolkit(Toolkit):
         try:
             from duckduckgo_search import DDGS
             
-            results = list(DDGS().text(keywords=query, max_results=num_results))
+            # DDGS is blocking, keep it off the event loop
+            results = await asyncio.to_thread(
+                lambda: list(DDGS().text(keywords=query, max_results=num_results))
+            )
             
             logger.info(f"🔍 Search returned {len(results)} results for: {query}")
-            return json.dumps({"query": query, "results": results}, indent=2)
+            return _dumps({"query": query, "results": results}, indent=True)
             
         except Exception as e:
             logger.error(f"Search error: {e}")
-            return json.dumps({"error": str(e), "query": query})
+            return _dumps({"error": str(e), "query": query})
     
     @tool(description="Visit a web page and return its content. Use this to read articles, documentation, or any web content.")
-    def visit_page(self, url: str) -> str:
+    async def visit_page(self, url: str) -> str:
         """
         Visit a web page and extract its content.
         
@@ -121,31 +227,27 @@ class BrowserToolkit(Toolkit):
         Returns:
             The page content as text
         """
-        import httpx
-        from bs4 import BeautifulSoup
+        key = ("visit_page", url, None)
+        cached = self._page_cache.get(key)
+        if cached is not None:
+            return cached
         
         try:
-            response = httpx.get(
-                url,
-                timeout=settings.browser_timeout / 1000,
-                follow_redirects=True,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-            )
+            html, status = await self._fetch(url)
             
-            soup = BeautifulSoup(response.text, "html.parser")
+            tree = LexborHTMLParser(html)
             
             # Remove script and style elements
-            for element in soup(["script", "style", "nav", "footer", "header"]):
+            for element in tree.css("script, style, nav, footer, header"):
                 element.decompose()
             
             # Get title
-            title = soup.title.string if soup.title else "No title"
+            title_node = tree.css_first("title")
+            title = title_node.text(strip=True) if title_node else "No title"
             
             # Get main content
-            main_content = soup.find("main") or soup.find("article") or soup.find("body")
-            text = main_content.get_text(separator="\n", strip=True) if main_content else ""
+            main_content = tree.css_first("main") or tree.css_first("article") or tree.body
+            text = main_content.text(separator="\n", strip=True) if main_content else ""
             
             # Truncate if too long
             if len(text) > 10000:
@@ -155,18 +257,21 @@ class BrowserToolkit(Toolkit):
                 "url": url,
                 "title": title,
                 "content": text,
-                "status": response.status_code
+                "status": status
             }
             
             logger.info(f"📄 Visited page: {url}")
-            return json.dumps(result, indent=2)
+            output = _dumps(result, indent=True)
+            if _cacheable(status):
+                self._page_cache[key] = output
+            return output
             
         except Exception as e:
             logger.error(f"Error visiting {url}: {e}")
-            return json.dumps({"error": str(e), "url": url})
+            return _dumps({"error": str(e), "url": url})
     
     @tool(description="Extract specific content from the current page using CSS selectors or text patterns.")
-    def extract_content(self, url: str, selector: Optional[str] = None) -> str:
+    async def extract_content(self, url: str, selector: Optional[str] = None) -> str:
         """
         Extract content from a page using selectors.
         
@@ -177,30 +282,35 @@ class BrowserToolkit(Toolkit):
         Returns:
             Extracted content
         """
-        import httpx
-        from bs4 import BeautifulSoup
+        key = ("extract_content", url, selector)
+        cached = self._page_cache.get(key)
+        if cached is not None:
+            return cached
         
         try:
-            response = httpx.get(url, timeout=10, follow_redirects=True)
-            soup = BeautifulSoup(response.text, "html.parser")
+            html, status = await self._fetch(url)
+            tree = LexborHTMLParser(html)
             
             if selector:
-                elements = soup.select(selector)
-                content = [el.get_text(strip=True) for el in elements]
+                elements = tree.css(selector)
+                content = [el.text(strip=True) for el in elements]
             else:
-                content = soup.get_text(separator="\n", strip=True)
+                content = tree.text(separator="\n", strip=True)
             
-            return json.dumps({
+            output = _dumps({
                 "url": url,
                 "selector": selector,
                 "content": content
-            }, indent=2)
+            }, indent=True)
+            if _cacheable(status):
+                self._page_cache[key] = output
+            return output
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Take a screenshot of a web page. Returns the screenshot as base64.")
-    def take_screenshot(self, url: str) -> str:
+    async def take_screenshot(self, url: str) -> str:
         """
         Take a screenshot of a web page.
         
@@ -210,52 +320,88 @@ class BrowserToolkit(Toolkit):
         Returns:
             Base64 encoded screenshot
         """
-        # For synchronous use, we'll use a placeholder
-        # In production, this would use Playwright async
-        return json.dumps({
-            "url": url,
-            "message": "Screenshot capability requires async browser. Use visit_page for content.",
-            "status": "not_available_in_sync_mode"
-        })
+        try:
+            async with page_pool.acquire() as page:
+                await page.goto(url, timeout=settings.browser_timeout)
+                screenshot = await page.screenshot(type="png")
+            
+            logger.info(f"📸 Took screenshot: {url}")
+            return _dumps({
+                "url": url,
+                "format": "png",
+                "screenshot": base64.b64encode(screenshot).decode()
+            })
+            
+        except Exception as e:
+            logger.error(f"Screenshot error for {url}: {e}")
+            return _dumps({"error": str(e), "url": url})
     
-    @tool(description="Click on an element on the current page using a CSS selector.")
-    def click_element(self, selector: str) -> str:
+    @tool(description="Open a web page and click on an element using a CSS selector.")
+    async def click_element(self, url: str, selector: str) -> str:
         """
         Click on a page element.
         
         Args:
+            url: The URL of the page containing the element
             selector: CSS selector for the element to click
         
         Returns:
             Result of the click action
         """
-        return json.dumps({
-            "selector": selector,
-            "message": "Click action requires active browser session",
-            "status": "use_async_mode"
-        })
+        try:
+            async with page_pool.acquire() as page:
+                await page.goto(url, timeout=settings.browser_timeout)
+                await page.click(selector, timeout=settings.browser_timeout)
+                await page.wait_for_load_state(timeout=settings.browser_timeout)
+                
+                result = {
+                    "url": url,
+                    "selector": selector,
+                    "status": "clicked",
+                    "current_url": page.url,
+                    "title": await page.title()
+                }
+            
+            logger.info(f"🖱️ Clicked {selector} on {url}")
+            return _dumps(result, indent=True)
+            
+        except Exception as e:
+            return _dumps({"error": str(e), "url": url, "selector": selector})
     
-    @tool(description="Fill a form field on the current page.")
-    def fill_form(self, selector: str, value: str) -> str:
+    @tool(description="Open a web page and fill a form field on it.")
+    async def fill_form(self, url: str, selector: str, value: str) -> str:
         """
         Fill a form field.
         
         Args:
+            url: The URL of the page containing the form
             selector: CSS selector for the form field
             value: Value to fill
         
         Returns:
             Result of the fill action
         """
-        return json.dumps({
-            "selector": selector,
-            "value": value,
-            "message": "Form fill requires active browser session",
-            "status": "use_async_mode"
-        })
+        try:
+            async with page_pool.acquire() as page:
+                await page.goto(url, timeout=settings.browser_timeout)
+                await page.fill(selector, value, timeout=settings.browser_timeout)
+                
+                result = {
+                    "url": url,
+                    "selector": selector,
+                    "value": value,
+                    "status": "filled",
+                    "current_url": page.url
+                }
+            
+            logger.info(f"⌨️ Filled {selector} on {url}")
+            return _dumps(result, indent=True)
+            
+        except Exception as e:
+            return _dumps({"error": str(e), "url": url, "selector": selector})
     
     @tool(description="Get all links from a web page.")
-    def get_page_links(self, url: str, filter_pattern: Optional[str] = None) -> str:
+    async def get_page_links(self, url: str, filter_pattern: Optional[str] = None) -> str:
         """
         Get all links from a web page.
         
@@ -266,47 +412,47 @@ class BrowserToolkit(Toolkit):
         Returns:
             List of links found on the page
         """
-        import httpx
-        from bs4 import BeautifulSoup
-        import re
-        from urllib.parse import urljoin
+        key = ("get_page_links", url, filter_pattern)
+        cached = self._page_cache.get(key)
+        if cached is not None:
+            return cached
         
         try:
-            response = httpx.get(url, timeout=10, follow_redirects=True)
-            soup = BeautifulSoup(response.text, "html.parser")
+            html, status = await self._fetch(url)
+            tree = LexborHTMLParser(html)
+            
+            pattern = re.compile(filter_pattern) if filter_pattern else None
             
+            # Filter and dedup in one pass; every unique link is counted,
+            # but only the first 50 are built into results
+            seen = set()
             links = []
-            for a in soup.find_all("a", href=True):
-                href = a["href"]
-                text = a.get_text(strip=True)
-                
+            for a in tree.css("a[href]"):
                 # Make absolute URL
-                absolute_url = urljoin(url, href)
+                absolute_url = urljoin(url, a.attributes["href"] or "")
                 
-                # Apply filter if provided
-                if filter_pattern:
-                    if not re.search(filter_pattern, absolute_url):
-                        continue
+                if pattern and not pattern.search(absolute_url):
+                    continue
+                if absolute_url in seen:
+                    continue
+                seen.add(absolute_url)
                 
-                links.append({
-                    "text": text[:100] if text else "",
-                    "url": absolute_url
-                })
-            
-            # Remove duplicates
-            seen = set()
-            unique_links = []
-            for link in links:
-                if link["url"] not in seen:
-                    seen.add(link["url"])
-                    unique_links.append(link)
+                if len(links) < 50:
+                    text = a.text(strip=True)
+                    links.append({
+                        "text": text[:100] if text else "",
+                        "url": absolute_url
+                    })
             
-            logger.info(f"🔗 Found {len(unique_links)} links on {url}")
-            return json.dumps({
+            logger.info(f"🔗 Found {len(seen)} links on {url}")
+            output = _dumps({
                 "url": url,
-                "link_count": len(unique_links),
-                "links": unique_links[:50]  # Limit to 50 links
-            }, indent=2)
+                "link_count": len(seen),
+                "links": links
+            }, indent=True)
+            if _cacheable(status):
+                self._page_cache[key] = output
+            return output
             
         except Exception as e:
-            return json.dumps({"error": str(e), "url": url})
+            return _dumps({"error": str(e), "url": url})
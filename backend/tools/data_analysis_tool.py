@@ -3,14 +3,370 @@ Data Analysis Tool - Data processing and visualization capabilities
 Uses Pandas, NumPy, and Plotly
 """
 
-from typing import Optional, Dict, Any, List, Union
-import json
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
+import importlib.util
 import io
+import os
 import base64
+import functools
+import re
+import numpy as np
+import orjson
+import pandas as pd
+from cachetools import LRUCache
 from loguru import logger
 
 from agno.tools import Toolkit, tool
 
+from config import settings
+from tools.serialization import dumps
+
+
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+_ERR_NOT_FOUND = "Dataset '{}' not found"
+
+# Charts above this many points render with WebGL and histograms are pre-binned
+_WEBGL_MIN_POINTS = 5_000
+_MAX_HISTOGRAM_BINS = 100
+
+# pyarrow's multithreaded CSV reader and Arrow string storage are used when it is installed
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+_CSV_ENGINE = "pyarrow" if _HAS_PYARROW else "c"
+
+# CSV files above this size are read in chunks of _CSV_CHUNK_ROWS rows
+_LARGE_CSV_BYTES = 200 * 1024 * 1024
+_CSV_CHUNK_ROWS = 1_000_000
+
+# Block size for pyarrow's threaded reader; each block is parsed by one thread
+_CSV_BLOCK_BYTES = 8 * 1024 * 1024
+
+# String columns with fewer distinct values than this share of rows become categoricals
+_CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Boolean masks kept per dataset for repeated filter conditions
+_MASK_CACHE_SIZE = 16
+
+# Aggregations aggregate_data computes with numpy ufunc.reduceat when its single key is sorted
+_REDUCEAT_AGGREGATIONS = {"sum", "mean", "count", "min", "max"}
+
+# describe_data looks for sample values in this many leading rows before scanning a whole column
+_SAMPLE_SCAN_ROWS = 1_000
+
+# Exports larger than this are written to a temporary file instead of returned inline
+_EXPORT_MAX_BYTES = 1_000_000
+
+# Exports are serialized this many rows at a time, so the size cap is checked as they are written
+_EXPORT_CHUNK_ROWS = 10_000
+
+# Dataset names are reduced to these characters when used as export file names
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.-]")
+
+
+_plotly = None
+
+
+def _get_plotly() -> Tuple[Any, Any]:
+    """plotly.express and plotly.io, imported on the first px chart since plotly is slow to load"""
+    global _plotly
+    if _plotly is None:
+        import plotly.express as px
+        import plotly.io as pio
+        _plotly = (px, pio)
+    return _plotly
+
+
+def _json_default(obj: Any) -> Any:
+    """Fallback for values orjson can't serialize; pandas' NA becomes null"""
+    if isinstance(obj, np.ndarray):
+        # Stringifying would emit the array's repr; pass arrays through _json_array
+        raise TypeError(f"Unserializable numpy array of dtype {obj.dtype}")
+    return None if obj is pd.NA else str(obj)
+
+
+def _json_array(values: Any) -> Any:
+    """A numpy array ready for _dumps: orjson only serializes C-contiguous numeric, bool and datetime arrays"""
+    if values.dtype.kind in "biufM":
+        return np.ascontiguousarray(values)
+    return values.tolist()
+
+
+# Tool results carry numpy values and non-string keys, which orjson handles natively
+_dumps = functools.partial(dumps, option=_JSON_OPTIONS, default=_json_default)
+
+
+def _read_csv_file(path: str, max_rows: Optional[int] = None) -> Any:
+    """Read a CSV file or URL, streaming large local files in chunks"""
+    # pyarrow's reader can't stop after max_rows, so row-capped reads use the C engine
+    engine = "c" if max_rows else _CSV_ENGINE
+    
+    if not os.path.isfile(path):
+        return pd.read_csv(path, engine=engine, nrows=max_rows)
+    
+    large = os.path.getsize(path) > _LARGE_CSV_BYTES
+    
+    if engine == "pyarrow":
+        if not large:
+            return pd.read_csv(path, engine=engine)
+        
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        read_options = pa_csv.ReadOptions(use_threads=True, block_size=_CSV_BLOCK_BYTES)
+        with pa.memory_map(path) as source:
+            return pa_csv.read_csv(source, read_options=read_options).to_pandas(self_destruct=True)
+    
+    # Local files are memory-mapped rather than read through Python's buffered I/O
+    if not large:
+        return pd.read_csv(path, engine=engine, nrows=max_rows, memory_map=True)
+    
+    with pd.read_csv(path, chunksize=_CSV_CHUNK_ROWS, nrows=max_rows, memory_map=True) as reader:
+        return pd.concat(reader, ignore_index=True)
+
+
+def _export_chunks(df: Any, format: str) -> Iterator[bytes]:
+    """Serialize a dataframe as CSV or JSON records, yielding the bytes in row chunks"""
+    if format == "csv":
+        # An empty frame still yields one (header-only) chunk
+        for start in range(0, max(len(df), 1), _EXPORT_CHUNK_ROWS):
+            chunk = df.iloc[start:start + _EXPORT_CHUNK_ROWS]
+            # pandas' writer, not pyarrow's: it handles mixed object columns and
+            # keeps the quoting and float formatting of earlier exports
+            sink = io.BytesIO()
+            chunk.to_csv(sink, index=False, header=start == 0)
+            yield sink.getvalue()
+        return
+    
+    if not len(df):
+        yield b"[]"
+        return
+    
+    # Each chunk is an indented JSON array; its elements are spliced into one array
+    yield b"[\n"
+    for start in range(0, len(df), _EXPORT_CHUNK_ROWS):
+        records = orjson.dumps(
+            df.iloc[start:start + _EXPORT_CHUNK_ROWS].to_dict(orient="records"),
+            default=_json_default,
+            option=_JSON_OPTIONS | orjson.OPT_INDENT_2
+        )[2:-2]
+        yield records if start == 0 else b",\n" + records
+    yield b"\n]"
+
+
+def _categorize(df: Any) -> Any:
+    """
+    Convert low-cardinality string columns to the category dtype, in place.
+    
+    Remaining object columns holding only strings move to Arrow-backed
+    storage when pyarrow is installed, so hashing and value counts run
+    over one contiguous buffer instead of Python string objects.
+    """
+    if len(df):
+        for col in df.select_dtypes(include=["object", "string"]).columns:
+            if df[col].nunique() / len(df) < _CATEGORY_MAX_UNIQUE_RATIO:
+                df[col] = df[col].astype("category")
+            elif (
+                _HAS_PYARROW and df[col].dtype == object
+                and pd.api.types.infer_dtype(df[col], skipna=True) == "string"
+            ):
+                df[col] = df[col].astype("string[pyarrow]")
+    return df
+
+
+def _top_values(series: Any, n: int = 10) -> Dict[Any, int]:
+    """Most frequent values of a column, selected without sorting every distinct value"""
+    counts = series.value_counts(sort=False).nlargest(n)
+    # Categoricals also report unobserved categories with a zero count
+    return counts[counts > 0].to_dict()
+
+
+def _fillna(column: Any, value: Any) -> Any:
+    """Fill missing values in a column, masking float arrays directly with numpy"""
+    if (
+        isinstance(column.dtype, np.dtype) and column.dtype.kind == "f"
+        and isinstance(value, (int, float)) and not isinstance(value, bool)
+    ):
+        values = column.to_numpy(copy=True)
+        np.putmask(values, np.isnan(values), value)
+        return values
+    
+    if column.dtype == "category" and value not in column.cat.categories:
+        column = column.cat.add_categories([value])
+    return column.fillna(value)
+
+
+def _op_rename(df: Any, op: Dict[str, Any]) -> Tuple[Any, str]:
+    """Rename one column"""
+    return df.rename(columns={op["old"]: op["new"]}), f"Renamed '{op['old']}' to '{op['new']}'"
+
+
+def _op_drop(df: Any, op: Dict[str, Any]) -> Tuple[Any, str]:
+    """Drop columns"""
+    return df.drop(columns=op["columns"]), f"Dropped columns: {op['columns']}"
+
+
+def _op_fillna(df: Any, op: Dict[str, Any]) -> Tuple[Any, str]:
+    """Fill missing values in one column"""
+    df[op["column"]] = _fillna(df[op["column"]], op["value"])
+    return df, f"Filled NA in '{op['column']}' with {op['value']}"
+
+
+def _op_astype(df: Any, op: Dict[str, Any]) -> Tuple[Any, str]:
+    """Cast one column to another dtype"""
+    df[op["column"]] = df[op["column"]].astype(op["dtype"])
+    return df, f"Changed '{op['column']}' type to {op['dtype']}"
+
+
+# transform_data operations by type; each returns the new frame and a summary line
+_TRANSFORM_OPS = {
+    "rename": _op_rename,
+    "drop": _op_drop,
+    "fillna": _op_fillna,
+    "astype": _op_astype,
+}
+
+
+def _table_rows(df: Any) -> Any:
+    """Row-major values of a dataframe, ready for _dumps without per-row dicts"""
+    # Column by column, since df.to_numpy() would upcast ints next to floats
+    return list(zip(*(df[col].tolist() for col in df.columns)))
+
+
+def _reduceat_aggregate(df: Any, key: str, aggregations: Dict[str, str]) -> Optional[Any]:
+    """
+    Single-key groupby aggregation with numpy ufunc.reduceat over contiguous key runs.
+    
+    Only applies when the key column is already sorted, where it skips the
+    groupby hash table entirely. Returns None when the pandas groupby is
+    needed instead: unsorted or null keys, unsupported aggregations, or
+    non-numeric or null-containing values.
+    """
+    if (
+        len(df) == 0
+        or key in aggregations
+        or not set(aggregations.values()) <= _REDUCEAT_AGGREGATIONS
+    ):
+        return None
+    
+    codes, uniques = pd.factorize(df[key], sort=True)
+    if codes[0] < 0 or (codes[1:] < codes[:-1]).any():
+        return None
+    
+    columns = {}
+    for column in aggregations:
+        values = df[column].to_numpy()
+        if values.dtype.kind not in "iuf" or (values.dtype.kind == "f" and np.isnan(values).any()):
+            return None
+        columns[column] = values
+    
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    counts = np.diff(np.append(starts, len(codes)))
+    
+    result = {key: uniques}
+    for column, func in aggregations.items():
+        values = columns[column]
+        if func == "count":
+            result[column] = counts
+        elif func == "min":
+            result[column] = np.minimum.reduceat(values, starts)
+        elif func == "max":
+            result[column] = np.maximum.reduceat(values, starts)
+        else:
+            sums = np.add.reduceat(values, starts)
+            result[column] = sums / counts if func == "mean" else sums
+    
+    return pd.DataFrame(result)
+
+
+def _correlation(numeric_df: Any) -> Dict[Any, Dict[Any, float]]:
+    """Pearson correlation matrix as a nested dict, computed with one matrix product"""
+    arr = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    # Pairwise NaN handling needs pandas' per-pair path
+    if np.isnan(arr).any():
+        return numeric_df.corr().to_dict()
+    
+    arr = arr - arr.mean(axis=0)
+    norms = np.sqrt(np.einsum("ij,ij->j", arr, arr))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        arr /= norms  # Constant columns become NaN, as with DataFrame.corr
+    
+    corr = np.clip(arr.T @ arr, -1.0, 1.0)
+    corr[np.diag_indices_from(corr)] = np.where(norms > 0, 1.0, np.nan)
+    
+    columns = numeric_df.columns
+    return {col: dict(zip(columns, row)) for col, row in zip(columns, corr.tolist())}
+
+
+def _lttb_indices(x: Any, y: Any, threshold: int) -> Any:
+    """
+    Pick the indices kept by Largest-Triangle-Three-Buckets downsampling.
+    
+    Each bucket's triangles are anchored on the means of its neighbouring
+    buckets instead of the previously picked point, so every bucket is
+    resolved at once with array operations rather than a Python loop.
+    """
+    n = len(x)
+    if threshold < 3 or n <= threshold:
+        return np.arange(n)
+    
+    # threshold - 2 buckets over the interior points; the endpoints are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    starts = edges[:-1] - 1
+    sizes = np.diff(edges)
+    bucket = np.repeat(np.arange(len(sizes)), sizes)
+    
+    bx, by = x[1:n - 1], y[1:n - 1]
+    mean_x = np.add.reduceat(bx, starts) / sizes
+    mean_y = np.add.reduceat(by, starts) / sizes
+    
+    ax = np.concatenate(([x[0]], mean_x[:-1]))[bucket]
+    ay = np.concatenate(([y[0]], mean_y[:-1]))[bucket]
+    cx = np.concatenate((mean_x[1:], [x[-1]]))[bucket]
+    cy = np.concatenate((mean_y[1:], [y[-1]]))[bucket]
+    
+    area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+    
+    # Sorting by (bucket, -area) puts each bucket's largest triangle at its start
+    order = np.lexsort((-area, bucket))
+    return np.concatenate(([0], order[starts] + 1, [n - 1]))
+
+
+def _downsample(x: Any, y: Any, max_points: int) -> tuple:
+    """Reduce an x/y series to at most `max_points` points with LTTB"""
+    if y.dtype.kind not in "iuf":
+        return x, y
+    
+    y_values = y.astype(np.float64)
+    if x.dtype.kind in "iuf":
+        x_values = x.astype(np.float64)
+    elif x.dtype.kind == "M":
+        x_values = x.view(np.int64).astype(np.float64)
+    else:
+        x_values = np.arange(len(x), dtype=np.float64)
+    
+    keep = np.isfinite(x_values) & np.isfinite(y_values)
+    if not keep.all():
+        x, y, x_values, y_values = x[keep], y[keep], x_values[keep], y_values[keep]
+    
+    # Unordered x values would make the buckets meaningless, so fall back to position
+    if len(x_values) > 1 and (x_values[1:] < x_values[:-1]).any():
+        x_values = np.arange(len(x_values), dtype=np.float64)
+    
+    idx = _lttb_indices(x_values, y_values, max_points)
+    return x[idx], y[idx]
+
+
+def _figure_spec(trace: Dict[str, Any], title: str, x_title: Optional[str], y_title: Optional[str]) -> str:
+    """Serialize a single-trace Plotly figure built as a plain dict"""
+    return _dumps({
+        "data": [trace],
+        "layout": {
+            "title": {"text": title},
+            "xaxis": {"title": {"text": x_title}},
+            "yaxis": {"title": {"text": y_title}}
+        }
+    })
+
 
 class DataAnalysisToolkit(Toolkit):
     """
@@ -27,6 +383,13 @@ class DataAnalysisToolkit(Toolkit):
         super().__init__(name="data_analysis")
         self.dataframes: Dict[str, Any] = {}  # Store loaded dataframes
         
+        # Serialized analyze/describe results per dataset, dropped whenever it is replaced
+        self._summaries: Dict[str, Dict[Tuple[Any, ...], str]] = {}
+        self._masks: Dict[str, LRUCache] = {}
+        
+        # (numeric, categorical) column names per dataset, computed on first use
+        self._partitions: Dict[str, Tuple[List[str], List[str]]] = {}
+        
         # Register tools
         self.register(self.load_csv)
         self.register(self.load_json_data)
@@ -38,28 +401,46 @@ class DataAnalysisToolkit(Toolkit):
         self.register(self.transform_data)
         self.register(self.export_data)
     
+    def _store(self, name: str, df: Any):
+        """Save a dataframe under a name, invalidating its cached summaries"""
+        self.dataframes[name] = df
+        self._summaries.pop(name, None)
+        self._masks.pop(name, None)
+        self._partitions.pop(name, None)
+    
+    def _column_partitions(self, name: str) -> Tuple[List[str], List[str]]:
+        """Numeric and categorical column names of a dataset, cached until it is replaced"""
+        partitions = self._partitions.get(name)
+        if partitions is None:
+            df = self.dataframes[name]
+            partitions = self._partitions[name] = (
+                df.select_dtypes(include=[np.number]).columns.tolist(),
+                df.select_dtypes(include=['object', 'string', 'category']).columns.tolist()
+            )
+        return partitions
+    
     @tool(description="Load data from a CSV file or CSV content. Returns a summary of the loaded data.")
-    def load_csv(self, source: str, name: str = "default") -> str:
+    def load_csv(self, source: str, name: str = "default", max_rows: Optional[int] = None) -> str:
         """
         Load CSV data from a file path or raw CSV content.
         
         Args:
             source: File path or raw CSV content
             name: Name to reference this dataset
+            max_rows: Only load the first N rows (optional)
         
         Returns:
             Summary of the loaded data
         """
-        import pandas as pd
-        
         try:
             # Check if source is a file path or raw content
             if source.endswith('.csv') or '/' in source or '\\' in source:
-                df = pd.read_csv(source)
+                df = _read_csv_file(source, max_rows)
             else:
-                df = pd.read_csv(io.StringIO(source))
+                df = pd.read_csv(io.StringIO(source), engine="c" if max_rows else _CSV_ENGINE, nrows=max_rows)
             
-            self.dataframes[name] = df
+            _categorize(df)
+            self._store(name, df)
             
             summary = {
                 "name": name,
@@ -71,11 +452,11 @@ class DataAnalysisToolkit(Toolkit):
             }
             
             logger.info(f"📊 Loaded CSV '{name}' with {len(df)} rows")
-            return json.dumps(summary, indent=2, default=str)
+            return _dumps(summary, indent=True)
             
         except Exception as e:
             logger.error(f"Error loading CSV: {e}")
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Load data from JSON format.")
     def load_json_data(self, data: str, name: str = "default") -> str:
@@ -89,16 +470,15 @@ class DataAnalysisToolkit(Toolkit):
         Returns:
             Summary of the loaded data
         """
-        import pandas as pd
-        
         try:
             if data.endswith('.json') or '/' in data or '\\' in data:
                 df = pd.read_json(data)
             else:
-                parsed = json.loads(data)
+                parsed = orjson.loads(data)
                 df = pd.DataFrame(parsed)
             
-            self.dataframes[name] = df
+            _categorize(df)
+            self._store(name, df)
             
             summary = {
                 "name": name,
@@ -108,10 +488,10 @@ class DataAnalysisToolkit(Toolkit):
             }
             
             logger.info(f"📊 Loaded JSON '{name}' with {len(df)} rows")
-            return json.dumps(summary, indent=2, default=str)
+            return _dumps(summary, indent=True)
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Perform statistical analysis on a dataset. Returns statistics like mean, median, std, correlations.")
     def analyze_data(self, name: str = "default", columns: Optional[List[str]] = None) -> str:
@@ -125,27 +505,32 @@ class DataAnalysisToolkit(Toolkit):
         Returns:
             Statistical analysis results
         """
-        import pandas as pd
-        import numpy as np
-        
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
+        
+        cache_key = ("analyze_data", tuple(columns) if columns else None)
+        cached = self._summaries.get(name, {}).get(cache_key)
+        if cached is not None:
+            return cached
         
         df = self.dataframes[name]
+        numeric_columns, cat_columns = self._column_partitions(name)
         
         if columns:
             df = df[columns]
+            numeric_set, cat_set = set(numeric_columns), set(cat_columns)
+            numeric_columns = [col for col in columns if col in numeric_set]
+            cat_columns = [col for col in columns if col in cat_set]
         
         try:
-            # Get numeric columns
-            numeric_df = df.select_dtypes(include=[np.number])
+            numeric_df = df[numeric_columns]
             
             analysis = {
                 "dataset": name,
                 "total_rows": len(df),
                 "total_columns": len(df.columns),
-                "numeric_columns": list(numeric_df.columns),
-                "categorical_columns": list(df.select_dtypes(include=['object']).columns),
+                "numeric_columns": numeric_columns,
+                "categorical_columns": cat_columns,
                 "statistics": {},
                 "correlations": {}
             }
@@ -157,20 +542,20 @@ class DataAnalysisToolkit(Toolkit):
                 
                 # Calculate correlations
                 if len(numeric_df.columns) > 1:
-                    corr = numeric_df.corr().to_dict()
-                    analysis["correlations"] = corr
+                    analysis["correlations"] = _correlation(numeric_df)
             
-            # Value counts for categorical columns
-            cat_columns = df.select_dtypes(include=['object']).columns
-            analysis["categorical_summary"] = {}
-            for col in cat_columns[:5]:  # Limit to first 5 categorical columns
-                analysis["categorical_summary"][col] = df[col].value_counts().head(10).to_dict()
+            # Value counts for categorical columns, limited to the first 5; category
+            # columns are counted over their integer codes
+            analysis["categorical_summary"] = {
+                col: _top_values(df[col], 10) for col in cat_columns[:5]
+            }
             
             logger.info(f"📈 Analyzed dataset '{name}'")
-            return json.dumps(analysis, indent=2, default=str)
+            output = self._summaries.setdefault(name, {})[cache_key] = _dumps(analysis, indent=True)
+            return output
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Create a chart/visualization from data. Supports bar, line, scatter, pie, histogram charts.")
     def create_chart(
@@ -180,7 +565,8 @@ class DataAnalysisToolkit(Toolkit):
         x_column: Optional[str] = None,
         y_column: Optional[str] = None,
         title: str = "Chart",
-        color_column: Optional[str] = None
+        color_column: Optional[str] = None,
+        max_points: Optional[int] = 5000
     ) -> str:
         """
         Create a chart visualization.
@@ -192,27 +578,74 @@ class DataAnalysisToolkit(Toolkit):
             y_column: Column for y-axis
             title: Chart title
             color_column: Column for color grouping (optional)
+            max_points: Downsample ungrouped line/scatter charts to this many points (optional)
         
         Returns:
             Chart data in JSON format (Plotly spec)
         """
-        import plotly.express as px
-        import plotly.graph_objects as go
-        
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
         
         df = self.dataframes[name]
         
         try:
-            fig = None
+            webgl = len(df) > _WEBGL_MIN_POINTS
+            
+            # Ungrouped bar/line/scatter/histogram traces are built as dicts straight
+            # from the column arrays; px would validate every point on the way
+            if x_column and not color_column:
+                spec = None
+                
+                if chart_type in ("scatter", "line") and y_column:
+                    x, y = df[x_column].to_numpy(), df[y_column].to_numpy()
+                    if max_points and len(df) > max_points:
+                        x, y = _downsample(x, y, max_points)
+                    
+                    spec = _figure_spec({
+                        "type": "scattergl" if webgl else "scatter",
+                        "mode": "markers" if chart_type == "scatter" else "lines",
+                        "x": _json_array(x),
+                        "y": _json_array(y)
+                    }, title, x_column, y_column)
+                
+                elif chart_type == "bar" and y_column:
+                    spec = _figure_spec({
+                        "type": "bar",
+                        "x": _json_array(df[x_column].to_numpy()),
+                        "y": _json_array(df[y_column].to_numpy())
+                    }, title, x_column, y_column)
+                
+                elif chart_type == "histogram" and webgl and df[x_column].dtype.kind in "iuf":
+                    # Bin server-side so only the bin counts are shipped, not every value
+                    values = df[x_column].dropna().to_numpy()
+                    bins = min(len(np.histogram_bin_edges(values, bins="auto")) - 1, _MAX_HISTOGRAM_BINS)
+                    counts, edges = np.histogram(values, bins=bins)
+                    spec = _figure_spec({
+                        "type": "bar",
+                        "x": (edges[:-1] + edges[1:]) / 2,
+                        "y": counts,
+                        "width": np.diff(edges)
+                    }, title, x_column, "count")
+                
+                elif chart_type == "histogram":
+                    spec = _figure_spec({
+                        "type": "histogram",
+                        "x": _json_array(df[x_column].to_numpy())
+                    }, title, x_column, "count")
+                
+                if spec is not None:
+                    logger.info(f"📊 Created {chart_type} chart: {title}")
+                    return spec
+            
+            px, pio = _get_plotly()
+            render_mode = "webgl" if webgl else "auto"
             
             if chart_type == "bar":
                 fig = px.bar(df, x=x_column, y=y_column, title=title, color=color_column)
             elif chart_type == "line":
-                fig = px.line(df, x=x_column, y=y_column, title=title, color=color_column)
+                fig = px.line(df, x=x_column, y=y_column, title=title, color=color_column, render_mode=render_mode)
             elif chart_type == "scatter":
-                fig = px.scatter(df, x=x_column, y=y_column, title=title, color=color_column)
+                fig = px.scatter(df, x=x_column, y=y_column, title=title, color=color_column, render_mode=render_mode)
             elif chart_type == "pie":
                 fig = px.pie(df, names=x_column, values=y_column, title=title)
             elif chart_type == "histogram":
@@ -220,16 +653,16 @@ class DataAnalysisToolkit(Toolkit):
             elif chart_type == "box":
                 fig = px.box(df, x=x_column, y=y_column, title=title, color=color_column)
             else:
-                return json.dumps({"error": f"Unknown chart type: {chart_type}"})
+                return _dumps({"error": f"Unknown chart type: {chart_type}"})
             
-            # Convert to JSON
-            chart_json = fig.to_json()
+            # Convert to JSON; the figure was validated as it was built
+            chart_json = pio.to_json(fig, validate=False, engine="orjson")
             
             logger.info(f"📊 Created {chart_type} chart: {title}")
             return chart_json
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Filter data based on conditions.")
     def filter_data(
@@ -249,18 +682,22 @@ class DataAnalysisToolkit(Toolkit):
         Returns:
             Summary of filtered data
         """
-        import pandas as pd
-        
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
         
         df = self.dataframes[name]
         
         try:
-            filtered_df = df.query(conditions)
+            # Evaluate the condition to a mask once per dataset; eval uses numexpr when installed
+            masks = self._masks.setdefault(name, LRUCache(maxsize=_MASK_CACHE_SIZE))
+            mask = masks.get(conditions)
+            if mask is None:
+                mask = masks[conditions] = df.eval(conditions)
+            
+            filtered_df = df[mask]
             
             if output_name:
-                self.dataframes[output_name] = filtered_df
+                self._store(output_name, filtered_df)
             
             result = {
                 "original_rows": len(df),
@@ -273,10 +710,10 @@ class DataAnalysisToolkit(Toolkit):
                 result["saved_as"] = output_name
             
             logger.info(f"🔍 Filtered '{name}': {len(df)} → {len(filtered_df)} rows")
-            return json.dumps(result, indent=2, default=str)
+            return _dumps(result, indent=True)
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Aggregate data with groupby operations.")
     def aggregate_data(
@@ -298,31 +735,36 @@ class DataAnalysisToolkit(Toolkit):
         Returns:
             Aggregated data summary
         """
-        import pandas as pd
-        
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
         
         df = self.dataframes[name]
         
         try:
-            agg_df = df.groupby(group_by).agg(aggregations).reset_index()
+            agg_df = None
+            if len(group_by) == 1:
+                agg_df = _reduceat_aggregate(df, group_by[0], aggregations)
+            
+            if agg_df is None:
+                # observed=True keeps categorical keys from expanding to every category combination
+                agg_df = df.groupby(group_by, observed=True).agg(aggregations).reset_index()
             
             if output_name:
-                self.dataframes[output_name] = agg_df
+                self._store(output_name, agg_df)
             
             result = {
                 "group_by": group_by,
                 "aggregations": aggregations,
                 "result_rows": len(agg_df),
-                "data": agg_df.to_dict(orient="records")
+                "columns": list(agg_df.columns),
+                "data": _table_rows(agg_df)
             }
             
             logger.info(f"📊 Aggregated '{name}' by {group_by}")
-            return json.dumps(result, indent=2, default=str)
+            return _dumps(result, indent=True)
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Get a detailed description of a dataset including data types, null values, and sample values.")
     def describe_data(self, name: str = "default") -> str:
@@ -335,10 +777,12 @@ class DataAnalysisToolkit(Toolkit):
         Returns:
             Detailed data description
         """
-        import pandas as pd
-        
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
+        
+        cached = self._summaries.get(name, {}).get(("describe_data",))
+        if cached is not None:
+            return cached
         
         df = self.dataframes[name]
         
@@ -350,21 +794,41 @@ class DataAnalysisToolkit(Toolkit):
                 "columns": []
             }
             
+            # One whole-frame pass per statistic instead of several per column
+            null_counts = df.isnull().sum()
+            null_percentages = (null_counts / len(df) * 100).round(2)
+            unique_counts = df.nunique(dropna=True)
+            dtypes = df.dtypes.astype(str)
+            
+            # Samples come from the leading rows; only columns too sparse there get a full scan
+            head = df.head(_SAMPLE_SCAN_ROWS)
+            samples = []
             for col in df.columns:
-                col_info = {
+                values = head[col].dropna()
+                if len(values) < 3 and len(head) < len(df):
+                    values = df[col].dropna()
+                samples.append(values.head(3).tolist())
+            
+            description["columns"] = [
+                {
                     "name": col,
-                    "dtype": str(df[col].dtype),
-                    "null_count": int(df[col].isnull().sum()),
-                    "null_percentage": round(df[col].isnull().sum() / len(df) * 100, 2),
-                    "unique_count": int(df[col].nunique()),
-                    "sample_values": df[col].dropna().head(3).tolist()
+                    "dtype": dtype,
+                    "null_count": null_count,
+                    "null_percentage": null_percentage,
+                    "unique_count": unique_count,
+                    "sample_values": sample_values
                 }
-                description["columns"].append(col_info)
+                for col, dtype, null_count, null_percentage, unique_count, sample_values in zip(
+                    df.columns, dtypes.tolist(), null_counts.tolist(),
+                    null_percentages.tolist(), unique_counts.tolist(), samples
+                )
+            ]
             
-            return json.dumps(description, indent=2, default=str)
+            output = self._summaries.setdefault(name, {})[("describe_data",)] = _dumps(description, indent=True)
+            return output
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Transform data: rename columns, create new columns, or apply functions.")
     def transform_data(
@@ -388,72 +852,91 @@ class DataAnalysisToolkit(Toolkit):
         Returns:
             Summary of transformations
         """
-        import pandas as pd
-        
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
         
-        df = self.dataframes[name].copy()
+        # Shallow copy: every _TRANSFORM_OPS handler returns a new frame or assigns
+        # a fresh column array, so the stored dataset's values are never written to
+        df = self.dataframes[name].copy(deep=False)
         results = []
         
         try:
             for op in operations:
-                op_type = op.get("type")
-                
-                if op_type == "rename":
-                    df = df.rename(columns={op["old"]: op["new"]})
-                    results.append(f"Renamed '{op['old']}' to '{op['new']}'")
-                
-                elif op_type == "drop":
-                    df = df.drop(columns=op["columns"])
-                    results.append(f"Dropped columns: {op['columns']}")
-                
-                elif op_type == "fillna":
-                    df[op["column"]] = df[op["column"]].fillna(op["value"])
-                    results.append(f"Filled NA in '{op['column']}' with {op['value']}")
-                
-                elif op_type == "astype":
-                    df[op["column"]] = df[op["column"]].astype(op["dtype"])
-                    results.append(f"Changed '{op['column']}' type to {op['dtype']}")
+                handler = _TRANSFORM_OPS.get(op.get("type"))
+                if handler:
+                    df, message = handler(df, op)
+                    results.append(message)
             
-            if output_name:
-                self.dataframes[output_name] = df
-            else:
-                self.dataframes[name] = df
+            self._store(output_name or name, df)
             
-            return json.dumps({
+            return _dumps({
                 "operations_applied": results,
                 "new_shape": {"rows": len(df), "columns": len(df.columns)},
                 "saved_as": output_name or name
-            }, indent=2)
+            }, indent=True)
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Export data to various formats (CSV, JSON).")
-    def export_data(self, name: str, format: str = "csv") -> str:
+    def export_data(self, name: str, format: str = "csv", max_bytes: int = _EXPORT_MAX_BYTES) -> str:
         """
         Export data to a specified format.
         
         Args:
             name: Dataset name
             format: Output format (csv, json)
+            max_bytes: Largest export returned inline; bigger exports are saved to a file
         
         Returns:
-            Exported data as string
+            Exported data as string, or a summary with the file path for large exports
         """
         if name not in self.dataframes:
-            return json.dumps({"error": f"Dataset '{name}' not found"})
+            return _dumps({"error": _ERR_NOT_FOUND.format(name)})
+        
+        if format not in ("csv", "json"):
+            return _dumps({"error": f"Unknown format: {format}"})
         
         df = self.dataframes[name]
         
+        # One file per dataset and format, overwritten by later exports
+        path = os.path.join(
+            settings.artifacts_dir, "exports", f"{_UNSAFE_FILENAME_CHARS.sub('_', name)}.{format}"
+        )
+        buffer = io.BytesIO()
+        file = None
+        size = 0
+        
         try:
-            if format == "csv":
-                return df.to_csv(index=False)
-            elif format == "json":
-                return df.to_json(orient="records", indent=2)
-            else:
-                return json.dumps({"error": f"Unknown format: {format}"})
+            try:
+                for chunk in _export_chunks(df, format):
+                    size += len(chunk)
+                    
+                    # Spill to disk as soon as the export outgrows max_bytes
+                    if file is None and size > max_bytes:
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        file = open(path, "wb", buffering=1 << 20)
+                        file.write(buffer.getbuffer())
+                        buffer = None
+                    
+                    (file or buffer).write(chunk)
+            finally:
+                if file is not None:
+                    file.close()
+            
+            if file is None:
+                return buffer.getvalue().decode()
+            
+            logger.info(f"💾 Exported '{name}' to {path} ({size} bytes)")
+            return _dumps({
+                "message": f"Export exceeds {max_bytes} bytes, saved to file",
+                "path": path,
+                "format": format,
+                "bytes": size,
+                "rows": len(df)
+            }, indent=True)
                 
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            if file is not None and os.path.exists(path):
+                os.remove(path)
+            return _dumps({"error": str(e)})
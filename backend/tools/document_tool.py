@@ -4,14 +4,173 @@ Supports Markdown, HTML, and structured documents
 """
 
 from typing import Optional, Dict, Any, List
-import json
+import itertools
 import os
-from datetime import datetime
+import re
+import string
+import threading
+from datetime import date, datetime
+from functools import lru_cache
 from loguru import logger
 
 from agno.tools import Toolkit, tool
 
 from config import settings
+from tools.serialization import dumps as _dumps
+
+
+# Markdown stripped by text exports, applied in order: heading markers,
+# then **bold** and *italic* kept as their inner text. The passes stay
+# separate so nested markers like ***x*** unwrap fully.
+_MD_STRIP = (
+    (re.compile(r'#{1,6}\s'), ''),
+    (re.compile(r'\*\*([^*]+)\*\*'), r'\1'),
+    (re.compile(r'\*([^*]+)\*'), r'\1')
+)
+
+
+def _strip_markdown(content: str) -> str:
+    """Remove heading, bold and italic markers from markdown text"""
+    for pattern, repl in _MD_STRIP:
+        content = pattern.sub(repl, content)
+    return content
+
+
+# markdown.Markdown instances keep per-document state, so each thread reuses its own
+_markdown_local = threading.local()
+
+
+def _get_markdown() -> Any:
+    """This thread's Markdown converter, built once with the export extensions"""
+    converter = getattr(_markdown_local, "converter", None)
+    if converter is None:
+        import markdown
+        converter = _markdown_local.converter = markdown.Markdown(extensions=['tables', 'fenced_code'])
+    return converter
+
+
+# Page wrapper for HTML exports that include metadata
+_HTML_TEMPLATE = string.Template("""<!DOCTYPE html>
+<html>
+<head>
+    <title>$title</title>
+    <meta name="created" content="$created">
+</head>
+<body>
+$body
+</body>
+</html>""")
+
+
+# Markdown heading markers indexed by level (1-6); index 0 is never used
+_HEADING_PREFIXES = ("", "#", "##", "###", "####", "#####", "######")
+
+# Markdown table separator cells by column alignment
+_ALIGN_MARKERS = {
+    "left": ":---",
+    "center": ":---:",
+    "right": "---:"
+}
+
+# format_content styles, each called with the text and the options dict
+_FORMATTERS = {
+    "bold": lambda t, o: f"**{t}**",
+    "italic": lambda t, o: f"*{t}*",
+    "code": lambda t, o: f"`{t}`",
+    "code_block": lambda t, o: f"```{o.get('language', '')}\n{t}\n```",
+    "quote": lambda t, o: "\n".join(f"> {line}" for line in t.split("\n")),
+    "list": lambda t, o: "\n".join(f"- {item}" for item in t.split("\n") if item.strip()),
+    "numbered_list": lambda t, o: "\n".join(f"{i+1}. {item}" for i, item in enumerate(t.split("\n")) if item.strip()),
+    "link": lambda t, o: f"[{t}]({o.get('url', '#')})",
+    "heading": lambda t, o: f"{'#' * o.get('level', 2)} {t}"
+}
+
+
+# Document templates by name: (skeleton, placeholder for empty content, date format)
+_TEMPLATES = {
+    "report": (string.Template("""# $title
+
+## Executive Summary
+
+$content
+
+## Introduction
+
+## Key Findings
+
+## Analysis
+
+## Recommendations
+
+## Conclusion
+
+---
+*Report generated on $date*
+"""), "[Add executive summary here]", "%Y-%m-%d"),
+    "article": (string.Template("""# $title
+
+*By [Author Name] | $date*
+
+## Introduction
+
+$content
+
+## Main Content
+
+## Conclusion
+
+## References
+"""), "[Add introduction here]", "%B %d, %Y"),
+    "readme": (string.Template("""# $title
+
+$content
+
+## Installation
+
+```bash
+# Add installation instructions
+```
+
+## Usage
+
+```
+# Add usage examples
+```
+
+## Features
+
+- Feature 1
+- Feature 2
+- Feature 3
+
+## Contributing
+
+## License
+"""), "[Project description]", None)
+}
+
+
+def _now_iso() -> str:
+    """Current local time as an ISO 8601 string"""
+    return datetime.now().isoformat()
+
+
+@lru_cache(maxsize=8)
+def _format_day(day: date, date_format: str) -> str:
+    """A day formatted for templates; each format is built once per day"""
+    return day.strftime(date_format)
+
+
+def _render_template(name: str, title: str, content: str, date_str: str) -> str:
+    """Fill a document template, using its placeholder when there is no content"""
+    skeleton, placeholder, _ = _TEMPLATES[name]
+    return skeleton.substitute(title=title, content=content or placeholder, date=date_str)
+
+
+@lru_cache(maxsize=256)
+def _render_blank_template(name: str, title: str, date_str: str) -> str:
+    """Template with no initial content, cached since it depends only on title and date"""
+    return _render_template(name, title, "", date_str)
 
 
 class DocumentToolkit(Toolkit):
@@ -29,6 +188,16 @@ class DocumentToolkit(Toolkit):
         super().__init__(name="document")
         self.documents: Dict[str, Dict[str, Any]] = {}
         
+        # Shared by documents and code files so every id number is used once
+        self._ids = itertools.count(1)
+        
+        # Serialized list_documents result, dropped whenever a document changes
+        self._listing: Optional[str] = None
+        
+        # Text appended to a document since its content was last joined; appends
+        # stay linear and the string is only rebuilt when the content is read
+        self._pending: Dict[str, List[str]] = {}
+        
         # Register tools
         self.register(self.create_document)
         self.register(self.edit_document)
@@ -40,6 +209,22 @@ class DocumentToolkit(Toolkit):
         self.register(self.export_document)
         self.register(self.create_code_file)
     
+    def _append(self, doc_id: str, text: str):
+        """Queue text to be appended to a document's content"""
+        self._pending.setdefault(doc_id, []).append(text)
+    
+    def _content(self, doc_id: str) -> str:
+        """A document's full content, joining any pending appends into it"""
+        doc = self.documents[doc_id]
+        pending = self._pending.pop(doc_id, None)
+        if pending:
+            doc["content"] = "".join([doc["content"], *pending])
+        return doc["content"]
+    
+    def _content_length(self, doc_id: str) -> int:
+        """Length of a document's content without joining pending appends"""
+        return len(self.documents[doc_id]["content"]) + sum(map(len, self._pending.get(doc_id, ())))
+    
     @tool(description="Create a new document with a title and optional initial content.")
     def create_document(
         self,
@@ -60,100 +245,48 @@ class DocumentToolkit(Toolkit):
         Returns:
             Document creation confirmation
         """
-        doc_id = f"doc_{len(self.documents) + 1}"
+        doc_id = f"doc_{next(self._ids)}"
         
         # Apply template if specified
         if template:
             content = self._apply_template(template, title, content)
         
+        now = _now_iso()
         document = {
             "id": doc_id,
             "title": title,
             "type": doc_type,
             "content": content,
             "sections": [],
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "metadata": {}
         }
         
         self.documents[doc_id] = document
+        self._listing = None
         
         logger.info(f"📝 Created document: {title} ({doc_id})")
         
-        return json.dumps({
+        return _dumps({
             "status": "created",
             "document_id": doc_id,
             "title": title,
             "type": doc_type,
-            "preview": content[:500] if content else ""
-        }, indent=2)
+            "preview": content[:settings.document_preview_chars]
+        }, indent=True)
     
     def _apply_template(self, template: str, title: str, content: str) -> str:
         """Apply a template to the document"""
-        templates = {
-            "report": f"""# {title}
-
-## Executive Summary
-
-{content or "[Add executive summary here]"}
-
-## Introduction
-
-## Key Findings
-
-## Analysis
-
-## Recommendations
-
-## Conclusion
-
----
-*Report generated on {datetime.now().strftime('%Y-%m-%d')}*
-""",
-            "article": f"""# {title}
-
-*By [Author Name] | {datetime.now().strftime('%B %d, %Y')}*
-
-## Introduction
-
-{content or "[Add introduction here]"}
-
-## Main Content
-
-## Conclusion
-
-## References
-""",
-            "readme": f"""# {title}
-
-{content or "[Project description]"}
-
-## Installation
-
-```bash
-# Add installation instructions
-```
-
-## Usage
-
-```
-# Add usage examples
-```
-
-## Features
-
-- Feature 1
-- Feature 2
-- Feature 3
-
-## Contributing
-
-## License
-"""
-        }
+        if template not in _TEMPLATES:
+            return content
         
-        return templates.get(template, content)
+        date_format = _TEMPLATES[template][2]
+        today = _format_day(date.today(), date_format) if date_format else ""
+        
+        if content:
+            return _render_template(template, title, content, today)
+        return _render_blank_template(template, title, today)
     
     @tool(description="Edit an existing document's content.")
     def edit_document(
@@ -178,32 +311,34 @@ class DocumentToolkit(Toolkit):
             Edit confirmation
         """
         if doc_id not in self.documents:
-            return json.dumps({"error": f"Document '{doc_id}' not found"})
+            return _dumps({"error": f"Document '{doc_id}' not found"})
         
         doc = self.documents[doc_id]
         
         try:
             if replace_pattern and replacement is not None:
-                doc["content"] = doc["content"].replace(replace_pattern, replacement)
+                doc["content"] = self._content(doc_id).replace(replace_pattern, replacement)
             elif new_content:
                 if append:
-                    doc["content"] += "\n" + new_content
+                    self._append(doc_id, "\n" + new_content)
                 else:
+                    self._pending.pop(doc_id, None)
                     doc["content"] = new_content
             
-            doc["updated_at"] = datetime.now().isoformat()
+            doc["updated_at"] = _now_iso()
+            self._listing = None
             
             logger.info(f"✏️ Edited document: {doc_id}")
             
-            return json.dumps({
+            return _dumps({
                 "status": "updated",
                 "document_id": doc_id,
                 "updated_at": doc["updated_at"],
-                "content_length": len(doc["content"])
-            }, indent=2)
+                "content_length": self._content_length(doc_id)
+            }, indent=True)
             
         except Exception as e:
-            return json.dumps({"error": str(e)})
+            return _dumps({"error": str(e)})
     
     @tool(description="Add a section to a document.")
     def add_section(
@@ -226,28 +361,29 @@ class DocumentToolkit(Toolkit):
             Confirmation of section addition
         """
         if doc_id not in self.documents:
-            return json.dumps({"error": f"Document '{doc_id}' not found"})
+            return _dumps({"error": f"Document '{doc_id}' not found"})
         
         doc = self.documents[doc_id]
         
         # Create section in markdown format
-        heading_prefix = "#" * min(max(level, 1), 6)
+        heading_prefix = _HEADING_PREFIXES[min(max(level, 1), 6)]
         section_content = f"\n\n{heading_prefix} {heading}\n\n{content}"
         
-        doc["content"] += section_content
+        self._append(doc_id, section_content)
         doc["sections"].append({
             "heading": heading,
             "level": level,
             "content_length": len(content)
         })
-        doc["updated_at"] = datetime.now().isoformat()
+        doc["updated_at"] = _now_iso()
+        self._listing = None
         
-        return json.dumps({
+        return _dumps({
             "status": "section_added",
             "document_id": doc_id,
             "section": heading,
             "total_sections": len(doc["sections"])
-        }, indent=2)
+        }, indent=True)
     
     @tool(description="Format content with markdown styling.")
     def format_content(
@@ -267,29 +403,17 @@ class DocumentToolkit(Toolkit):
         Returns:
             Formatted text
         """
-        options = options or {}
-        
-        formatters = {
-            "bold": lambda t: f"**{t}**",
-            "italic": lambda t: f"*{t}*",
-            "code": lambda t: f"`{t}`",
-            "code_block": lambda t: f"```{options.get('language', '')}\n{t}\n```",
-            "quote": lambda t: "\n".join(f"> {line}" for line in t.split("\n")),
-            "list": lambda t: "\n".join(f"- {item}" for item in t.split("\n") if item.strip()),
-            "numbered_list": lambda t: "\n".join(f"{i+1}. {item}" for i, item in enumerate(t.split("\n")) if item.strip()),
-            "link": lambda t: f"[{t}]({options.get('url', '#')})",
-            "heading": lambda t: f"{'#' * options.get('level', 2)} {t}"
-        }
+        formatter = _FORMATTERS.get(format_type)
         
-        if format_type in formatters:
-            formatted = formatters[format_type](text)
-            return json.dumps({
+        if formatter:
+            formatted = formatter(text, options or {})
+            return _dumps({
                 "original": text,
                 "formatted": formatted,
                 "format_type": format_type
-            }, indent=2)
+            }, indent=True)
         else:
-            return json.dumps({"error": f"Unknown format type: {format_type}"})
+            return _dumps({"error": f"Unknown format type: {format_type}"})
     
     @tool(description="Generate a markdown table from data.")
     def generate_table(
@@ -313,28 +437,20 @@ class DocumentToolkit(Toolkit):
         if not alignment:
             alignment = ["left"] * len(headers)
         
-        # Alignment markers
-        align_markers = {
-            "left": ":---",
-            "center": ":---:",
-            "right": "---:"
-        }
-        
         # Build table
-        header_row = "| " + " | ".join(str(h) for h in headers) + " |"
-        separator_row = "| " + " | ".join(align_markers.get(a, ":---") for a in alignment) + " |"
+        lines = [
+            "| " + " | ".join(map(str, headers)) + " |",
+            "| " + " | ".join(_ALIGN_MARKERS.get(a, ":---") for a in alignment) + " |"
+        ]
+        lines.extend("| " + " | ".join(map(str, row)) + " |" for row in rows)
         
-        data_rows = []
-        for row in rows:
-            data_rows.append("| " + " | ".join(str(cell) for cell in row) + " |")
+        table = "\n".join(lines)
         
-        table = "\n".join([header_row, separator_row] + data_rows)
-        
-        return json.dumps({
+        return _dumps({
             "table": table,
             "columns": len(headers),
             "rows": len(rows)
-        }, indent=2)
+        }, indent=True)
     
     @tool(description="Get the content of a document.")
     def get_document(self, doc_id: str) -> str:
@@ -348,10 +464,10 @@ class DocumentToolkit(Toolkit):
             Document content and metadata
         """
         if doc_id not in self.documents:
-            return json.dumps({"error": f"Document '{doc_id}' not found"})
+            return _dumps({"error": f"Document '{doc_id}' not found"})
         
-        doc = self.documents[doc_id]
-        return json.dumps(doc, indent=2)
+        self._content(doc_id)
+        return _dumps(self.documents[doc_id], indent=True)
     
     @tool(description="List all available documents.")
     def list_documents(self) -> str:
@@ -361,22 +477,27 @@ class DocumentToolkit(Toolkit):
         Returns:
             List of document summaries
         """
-        docs = []
-        for doc_id, doc in self.documents.items():
-            docs.append({
+        if self._listing is not None:
+            return self._listing
+        
+        docs = [
+            {
                 "id": doc_id,
                 "title": doc["title"],
                 "type": doc["type"],
-                "content_length": len(doc["content"]),
+                "content_length": self._content_length(doc_id),
                 "sections": len(doc["sections"]),
                 "created_at": doc["created_at"],
                 "updated_at": doc["updated_at"]
-            })
+            }
+            for doc_id, doc in self.documents.items()
+        ]
         
-        return json.dumps({
+        self._listing = _dumps({
             "count": len(docs),
             "documents": docs
-        }, indent=2)
+        }, indent=True)
+        return self._listing
     
     @tool(description="Export a document to a specific format.")
     def export_document(
@@ -397,38 +518,31 @@ class DocumentToolkit(Toolkit):
             Exported document content
         """
         if doc_id not in self.documents:
-            return json.dumps({"error": f"Document '{doc_id}' not found"})
+            return _dumps({"error": f"Document '{doc_id}' not found"})
         
         doc = self.documents[doc_id]
-        content = doc["content"]
+        content = self._content(doc_id)
         
         if format == "html":
-            import markdown
-            content = markdown.markdown(content, extensions=['tables', 'fenced_code'])
+            content = _get_markdown().reset().convert(content)
             if include_metadata:
-                content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>{doc['title']}</title>
-    <meta name="created" content="{doc['created_at']}">
-</head>
-<body>
-{content}
-</body>
-</html>"""
+                content = _HTML_TEMPLATE.substitute(
+                    title=doc['title'],
+                    created=doc['created_at'],
+                    body=content
+                )
         
         elif format == "text":
-            # Simple conversion - strip markdown
-            import re
-            content = re.sub(r'#{1,6}\s', '', content)  # Remove headings
-            content = re.sub(r'\*\*([^*]+)\*\*', r'\1', content)  # Remove bold
-            content = re.sub(r'\*([^*]+)\*', r'\1', content)  # Remove italic
+            # Simple conversion - strip markdown, skipping the regex
+            # engine when there are no markers at all
+            if '#' in content or '*' in content:
+                content = _strip_markdown(content)
         
-        return json.dumps({
+        return _dumps({
             "document_id": doc_id,
             "format": format,
             "content": content
-        }, indent=2)
+        }, indent=True)
     
     @tool(description="Create a code file with syntax-highlighted content.")
     def create_code_file(
@@ -450,8 +564,9 @@ class DocumentToolkit(Toolkit):
         Returns:
             Code file creation confirmation
         """
-        doc_id = f"code_{len(self.documents) + 1}"
+        doc_id = f"code_{next(self._ids)}"
         
+        now = _now_iso()
         document = {
             "id": doc_id,
             "title": filename,
@@ -460,8 +575,8 @@ class DocumentToolkit(Toolkit):
             "content": code,
             "description": description,
             "sections": [],
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "metadata": {
                 "filename": filename,
                 "language": language,
@@ -470,14 +585,15 @@ class DocumentToolkit(Toolkit):
         }
         
         self.documents[doc_id] = document
+        self._listing = None
         
         logger.info(f"💻 Created code file: {filename}")
         
-        return json.dumps({
+        return _dumps({
             "status": "created",
             "document_id": doc_id,
             "filename": filename,
             "language": language,
             "lines": document["metadata"]["lines"],
             "code": code
-        }, indent=2)
+        }, indent=True)
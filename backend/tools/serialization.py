@@ -0,0 +1,19 @@
+"""
+JSON serialization shared by the toolkits
+"""
+
+from typing import Any, Callable, Optional
+
+import orjson
+
+
+def dumps(
+    obj: Any,
+    indent: bool = False,
+    option: int = 0,
+    default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """Serialize a tool result to a JSON string with orjson"""
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=default, option=option).decode()
@@ -87,37 +87,28 @@ class WebSocketService {
         break;
 
       case "step":
-        if (message.data) {
-          const stepData = message.data as { step: ExecutionStep };
-          this.handlers.onStep?.(stepData.step);
+        if (message.step) {
+          this.handlers.onStep?.(message.step);
         }
         break;
 
       case "token":
-        if (message.data) {
-          const tokenData = message.data as { content: string };
-          this.handlers.onToken?.(tokenData.content);
+        if (message.content !== undefined) {
+          this.handlers.onToken?.(message.content);
         }
         break;
 
       case "artifact":
-        if (message.data) {
-          const artifactData = message.data as { artifact: Artifact };
-          this.handlers.onArtifact?.(artifactData.artifact);
+        if (message.artifact) {
+          this.handlers.onArtifact?.(message.artifact);
         }
         break;
 
       case "complete":
-        if (message.data) {
-          const completeData = message.data as {
-            success: boolean;
-            total_duration_ms: number;
-          };
-          this.handlers.onComplete?.({
-            success: completeData.success,
-            duration_ms: completeData.total_duration_ms,
-          });
-        }
+        this.handlers.onComplete?.({
+          success: message.success ?? false,
+          duration_ms: message.total_duration_ms ?? 0,
+        });
         break;
 
       case "error":
@@ -128,6 +119,11 @@ class WebSocketService {
         // Heartbeat response
         break;
 
+      case "batch":
+        // Several events coalesced into one frame by the server
+        message.events?.forEach((event) => this.handleMessage(event));
+        break;
+
       default:
         console.log("Unknown message type:", message.type);
     }
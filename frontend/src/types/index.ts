@@ -79,10 +79,16 @@ export interface WSMessage {
     | "complete"
     | "error"
     | "connected"
-    | "pong";
-  data?: unknown;
+    | "pong"
+    | "batch";
   session_id?: string;
   message?: string;
+  step?: ExecutionStep;
+  content?: string;
+  artifact?: Artifact;
+  success?: boolean;
+  total_duration_ms?: number;
+  events?: WSMessage[];
 }
 
 // Tool types